@@ -1,9 +1,24 @@
-from typing import List, Dict, Any, Tuple
+from typing import List, Dict, Any, Iterable, Iterator, NamedTuple, Optional, Tuple
 from datetime import datetime, timedelta
 import base64
+import csv
+import functools
+import io
 import logging
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import quote, urlencode
+import ijson
+import orjson
 import requests
-from fastapi import HTTPException, Depends
+from requests.adapters import HTTPAdapter
+from urllib3.util.request import ACCEPT_ENCODING
+from urllib3.util.retry import Retry
+from fastapi import HTTPException
+from sqlalchemy import JSON, Text, bindparam, cast, insert, or_, select, text, update
+from sqlalchemy.dialects import postgresql, sqlite
 from sqlalchemy.orm import Session
 from sqlalchemy.exc import SQLAlchemyError
 from database import (
@@ -14,28 +29,490 @@ from database import (
     SeriesEpisode,
     RefreshData,
     UserInfo,
-    get_db,
     LiveCategory,
     FilmStream,
     FilmDetail,
     EpgListing,
 )
-from utils import cache_icon
+from utils import cache_backdrop, cache_icons, utcnow
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Rows per executemany call; bounds how much of a streamed refresh is held in
+# memory at once
+BULK_INSERT_BATCH_SIZE = 10_000
+
+# How long a refreshed data_type is served from the database
+REFRESH_TTL = timedelta(hours=24)
+
+# Overrides by data_type prefix, for data that changes faster or slower
+REFRESH_TTLS = {
+    "film_categories": timedelta(days=7),
+    "film_streams": timedelta(hours=6),
+    "film_details": timedelta(days=30),
+    "epg": timedelta(hours=1),
+}
+
+# Upper bound on how long assembled results are reused from memory; also
+# bounds how stale another worker process's copy can be after a refresh
+MEMO_TTL = timedelta(minutes=10)
+MEMO_MAX_SIZE = 1000
+
+# Concurrent refreshes of one data_type queue on one of these locks, so a
+# stale entry triggers a single upstream fetch rather than one per request
+REFRESH_LOCK_STRIPES = 64
+
+# (connect, read) timeout for Xtream API requests
+API_TIMEOUT = (5, 30)
+
+# UserInfo column -> (section, key) in the player_api.php user info payload
+USER_INFO_FIELDS = {
+    "username": ("user_info", "username"),
+    "password": ("user_info", "password"),
+    "message": ("user_info", "message"),
+    "auth": ("user_info", "auth"),
+    "status": ("user_info", "status"),
+    "exp_date": ("user_info", "exp_date"),
+    "is_trial": ("user_info", "is_trial"),
+    "active_cons": ("user_info", "active_cons"),
+    "created_at": ("user_info", "created_at"),
+    "max_connections": ("user_info", "max_connections"),
+    "allowed_output_formats": ("user_info", "allowed_output_formats"),
+    "server_url": ("server_info", "url"),
+    "server_port": ("server_info", "port"),
+    "server_https_port": ("server_info", "https_port"),
+    "server_protocol": ("server_info", "server_protocol"),
+    "server_rtmp_port": ("server_info", "rtmp_port"),
+    "server_timezone": ("server_info", "timezone"),
+    "server_timestamp_now": ("server_info", "timestamp_now"),
+    "server_time_now": ("server_info", "time_now"),
+}
+
+
+# Rows fetched per round-trip when streaming list views out of the database
+READ_BATCH_SIZE = 1000
+
+# Columns read back for list views, in the order rows are zipped into dicts
+LIVE_CHANNEL_KEYS = (
+    "num",
+    "name",
+    "stream_type",
+    "stream_id",
+    "stream_icon",
+    "epg_channel_id",
+    "added",
+    "added_date",
+    "category_id",
+    "custom_sid",
+    "tv_archive",
+    "direct_source",
+    "tv_archive_duration",
+)
+LIVE_CHANNEL_COLUMNS = tuple(LiveChannel.__table__.c[key] for key in LIVE_CHANNEL_KEYS)
+
+FILM_STREAM_KEYS = (
+    "num",
+    "name",
+    "stream_type",
+    "stream_id",
+    "stream_icon",
+    "rating",
+    "rating_5based",
+    "added",
+    "added_date",
+    "category_id",
+    "container_extension",
+    "custom_sid",
+    "direct_source",
+)
+FILM_STREAM_COLUMNS = tuple(FilmStream.__table__.c[key] for key in FILM_STREAM_KEYS)
+
+SERIES_KEYS = (
+    "series_id",
+    "name",
+    "cover",
+    "plot",
+    "cast",
+    "director",
+    "genre",
+    "release_date",
+    "last_modified",
+    "rating",
+    "rating_5based",
+    "backdrop_path",
+    "youtube_trailer",
+    "episode_run_time",
+    "category_id",
+)
+SERIES_COLUMNS = tuple(Series.__table__.c[key] for key in SERIES_KEYS)
+# The all-series listing uses the upstream releaseDate key
+ALL_SERIES_KEYS = tuple(
+    "releaseDate" if key == "release_date" else key for key in SERIES_KEYS
+)
+
+FILM_CATEGORY_KEYS = ("category_id", "category_name", "parent_id")
+FILM_CATEGORY_COLUMNS = tuple(
+    FilmCategory.__table__.c[key] for key in FILM_CATEGORY_KEYS
+)
+
+# Hot read statements built once with bound parameters, so every call hits
+# the engine's compiled-statement cache
+LIVE_CHANNELS_BY_CATEGORY = (
+    select(*LIVE_CHANNEL_COLUMNS)
+    .where(LiveChannel.category_id == bindparam("category_id"))
+    .order_by(LiveChannel.num)
+    .execution_options(yield_per=READ_BATCH_SIZE)
+)
+SERIES_BY_CATEGORY = (
+    select(*SERIES_COLUMNS)
+    .where(Series.category_id == bindparam("category_id"))
+    .execution_options(yield_per=READ_BATCH_SIZE)
+)
+FILM_STREAMS_BY_CATEGORY = (
+    select(*FILM_STREAM_COLUMNS)
+    .where(FilmStream.category_id == bindparam("category_id"))
+    .execution_options(yield_per=READ_BATCH_SIZE)
+)
+SERIES_BY_ID = select(*SERIES_COLUMNS).where(Series.series_id == bindparam("series_id"))
+SERIES_EPISODES = (
+    select(
+        SeriesEpisode.id,
+        SeriesEpisode.season,
+        SeriesEpisode.episode,
+        SeriesEpisode.title,
+        SeriesEpisode.container_extension,
+        SeriesEpisode.plot,
+        SeriesEpisode.duration,
+        SeriesEpisode.rating,
+        SeriesEpisode.info,
+    )
+    .where(SeriesEpisode.series_id == bindparam("series_id"))
+    .order_by(SeriesEpisode.season, SeriesEpisode.episode)
+)
+
+
+class RefreshState(NamedTuple):
+    last_refresh: datetime
+    expires_at: Optional[datetime]
+    etag: Optional[str] = None
 
-class ConnectionInfo:
-    def __init__(self, base_url: str, username: str, password: str):
-        self.base_url = base_url
-        self.username = username
-        self.password = password
+
+def _copy_value(value):
+    # CSV field for PostgreSQL COPY: \N for NULL, JSON text for JSON columns
+    if value is None:
+        return "\\N"
+    if isinstance(value, (dict, list)):
+        return orjson.dumps(value).decode()
+    return value
+
+
+class ConnectionInfo(NamedTuple):
+    # Immutable and slotted, so attribute reads skip a per-instance __dict__
+    base_url: str
+    username: str
+    password: str
+
+
+def _format_added(added) -> str:
+    # isoformat renders "%Y-%m-%d %H:%M:%S" without strftime's format parsing
+    return datetime.fromtimestamp(int(added)).isoformat(" ", "seconds")
+
+
+@functools.lru_cache(maxsize=256)
+def _build_url(
+    base_url: str, username: str, password: str, action: Optional[str], extra: tuple
+) -> str:
+    params = [("username", username), ("password", password)]
+    if action:
+        params.append(("action", action))
+    params.extend(extra)
+    return f"{base_url}/player_api.php?{urlencode(params)}"
+
+
+def _api_url(connection_info: ConnectionInfo, action: Optional[str] = None, **params):
+    return _build_url(
+        connection_info.base_url,
+        connection_info.username,
+        connection_info.password,
+        action,
+        tuple(sorted(params.items())),
+    )
 
 
 class CachedApiClient:
     def __init__(self):
-        pass
+        # Share one pooled session so bursts of calls to the same Xtream host
+        # reuse the TCP/TLS connection instead of handshaking per request
+        self._session = requests.Session()
+        # urllib3 lists brotli ("br") only when a decoder is installed
+        self._session.headers.update(
+            {"User-Agent": "xtream-loader/1.0", "Accept-Encoding": ACCEPT_ENCODING}
+        )
+        # Retry transient gateway errors from the Xtream panel with backoff
+        retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504])
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=16, max_retries=retries)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        # Overlaps independent upstream round-trips, such as prefetching series
+        # categories while the all-series listing downloads
+        self._refresh_pool = ThreadPoolExecutor(max_workers=8)
+
+        # data_type -> RefreshState, kept in step with the RefreshData table
+        self._refresh_cache: Dict[str, RefreshState] = {}
+        self._refresh_lock = threading.Lock()
+
+        # key -> (expires_at, result) for assembled (data, fetch, expiry) tuples
+        self._memo: Dict[tuple, Tuple[datetime, Any]] = {}
+        self._memo_lock = threading.Lock()
+
+        self._flight_locks = [threading.RLock() for _ in range(REFRESH_LOCK_STRIPES)]
+
+    def _flight_lock(self, data_type: str) -> threading.RLock:
+        return self._flight_locks[hash(data_type) % REFRESH_LOCK_STRIPES]
+
+    def _memoized(
+        self,
+        data_type: str,
+        connection_info: ConnectionInfo,
+        force_refresh: bool,
+        db: Session,
+        compute,
+    ):
+        # Reuse a result until its refresh expiry (or MEMO_TTL, if sooner) so
+        # repeat page views skip the database; force_refresh always recomputes
+        key = (data_type, connection_info.base_url)
+        now = utcnow()
+        with self._memo_lock:
+            hit = self._memo.get(key)
+        if hit and hit[0] > now and not force_refresh:
+            return hit[1]
+
+        with self._flight_lock(data_type):
+            # Another request may have recomputed this while we waited
+            with self._memo_lock:
+                hit = self._memo.get(key, hit)
+            if hit and hit[0] > now and not force_refresh:
+                return hit[1]
+
+            try:
+                result = compute()
+            except requests.RequestException as e:
+                # An explicit refresh must report the failure rather than
+                # pass off old data as new
+                if hit is None or force_refresh:
+                    raise
+                # Upstream is failing; an expired copy beats an error page.
+                # Discard any rows a streamed refresh wrote before failing so
+                # a later commit on this session can't persist half of it
+                db.rollback()
+                logger.warning(f"Serving stale {data_type} after upstream error: {e}")
+                return hit[1]
+
+            expires_at = min(result[2], now + MEMO_TTL)
+            with self._memo_lock:
+                if len(self._memo) >= MEMO_MAX_SIZE:
+                    for stale in [k for k, v in self._memo.items() if v[0] <= now]:
+                        del self._memo[stale]
+                    if len(self._memo) >= MEMO_MAX_SIZE:
+                        self._memo.clear()
+                self._memo[key] = (expires_at, result)
+            return result
+
+    def _prepare_details(self, result):
+        # Resolve the backdrop and quote the trailer once, before memoizing
+        info = result[0]["info"]
+        info["cached_backdrop"] = cache_backdrop(info.get("backdrop_path"))
+        youtube_trailer = info.get("youtube_trailer")
+        if isinstance(youtube_trailer, list):
+            youtube_trailer = youtube_trailer[0] if youtube_trailer else None
+            info["youtube_trailer"] = youtube_trailer
+        if youtube_trailer:
+            info["youtube_trailer"] = quote(youtube_trailer)
+        return result
+
+    def _get_refresh(self, db: Session, data_type: str) -> Optional[RefreshState]:
+        # Serve fresh timestamps from memory so warm requests skip the SELECT
+        with self._refresh_lock:
+            refresh = self._refresh_cache.get(data_type)
+        if not self._is_stale(refresh):
+            return refresh
+
+        row = (
+            db.query(RefreshData.last_refresh, RefreshData.expires_at, RefreshData.etag)
+            .filter(RefreshData.data_type == data_type)
+            .first()
+        )
+        if row is None:
+            return None
+        refresh = RefreshState(*row)
+        with self._refresh_lock:
+            self._refresh_cache[data_type] = refresh
+        return refresh
+
+    def _is_stale(self, refresh: Optional[RefreshState]) -> bool:
+        return (
+            refresh is None
+            or refresh.expires_at is None
+            or refresh.expires_at <= utcnow()
+        )
+
+    def _fetch(
+        self, url: str, refresh: Optional[RefreshState], force_refresh: bool, **kwargs
+    ) -> Optional[requests.Response]:
+        # Revalidate with the stored ETag; None means upstream is unchanged
+        headers = {}
+        if refresh is not None and refresh.etag and not force_refresh:
+            headers["If-None-Match"] = refresh.etag
+        response = self._session.get(
+            url, headers=headers, timeout=API_TIMEOUT, **kwargs
+        )
+        if response.status_code == 304:
+            return None
+        response.raise_for_status()
+        return response
+
+    def _ttl_for(self, data_type: str) -> timedelta:
+        for prefix, ttl in REFRESH_TTLS.items():
+            if data_type == prefix or data_type.startswith(f"{prefix}_"):
+                return ttl
+        return REFRESH_TTL
+
+    def _mark_refreshed(
+        self,
+        db: Session,
+        data_type: str,
+        response: Optional[requests.Response] = None,
+    ) -> RefreshState:
+        # One upsert on the unique data_type instead of SELECT then INSERT/UPDATE;
+        # a 304 keeps the stored ETag, which RETURNING hands back
+        last_refresh = utcnow()
+        values = {
+            "last_refresh": last_refresh,
+            "expires_at": last_refresh + self._ttl_for(data_type),
+        }
+        if response is not None:
+            values["etag"] = response.headers.get("ETag")
+        stmt = self._insert(db, RefreshData).values(data_type=data_type, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["data_type"], set_=values
+        ).returning(RefreshData.last_refresh, RefreshData.expires_at, RefreshData.etag)
+        refresh = RefreshState(*db.execute(stmt).one())
+        db.commit()
+
+        with self._refresh_lock:
+            self._refresh_cache[data_type] = refresh
+        # Anything memoized from the old rows is out of date
+        with self._memo_lock:
+            for key in [k for k in self._memo if k[0] == data_type]:
+                del self._memo[key]
+        return refresh
+
+    def _optimize(self, db: Session) -> None:
+        # After a catalog-wide rewrite, let SQLite refresh planner statistics
+        # and fold the WAL back into the database so it doesn't keep growing
+        if db.bind.dialect.name == "sqlite":
+            db.execute(text("PRAGMA optimize"))
+            db.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+            db.commit()
+
+    def _batches(self, model, rows: Iterable[Dict[str, Any]]):
+        # Consume rows lazily so generators never need to be fully materialized
+        rows = iter(rows)
+        while batch := list(islice(rows, BULK_INSERT_BATCH_SIZE)):
+            started = time.perf_counter()
+            yield batch
+            elapsed = time.perf_counter() - started
+            logger.debug(
+                f"Wrote {len(batch)} {model.__tablename__} rows "
+                f"({len(batch) / max(elapsed, 1e-6):.0f} rows/s)"
+            )
+
+    def _bulk_insert(self, db: Session, model, rows: Iterable[Dict[str, Any]]) -> None:
+        if db.bind.dialect.driver == "psycopg2":
+            for batch in self._batches(model, rows):
+                self._copy_batch(db, model, batch)
+            return
+        # Core executemany against the table skips ORM unit-of-work bookkeeping
+        stmt = insert(model.__table__)
+        for batch in self._batches(model, rows):
+            db.execute(stmt, batch)
+
+    def _copy_batch(self, db: Session, model, batch: List[Dict[str, Any]]) -> None:
+        # COPY streams the whole batch to PostgreSQL in one transfer instead of
+        # parsing an INSERT per row; \N marks NULL so empty strings survive
+        columns = list(batch[0])
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for row in batch:
+            writer.writerow([_copy_value(row.get(column)) for column in columns])
+        buffer.seek(0)
+        # Quoted, since EPG has an "end" column
+        column_list = ", ".join(f'"{column}"' for column in columns)
+        cursor = db.connection().connection.cursor()
+        try:
+            cursor.copy_expert(
+                f"COPY {model.__tablename__} ({column_list}) "
+                "FROM STDIN WITH (FORMAT csv, NULL '\\N')",
+                buffer,
+            )
+        finally:
+            cursor.close()
+
+    def _insert(self, db: Session, model):
+        if db.bind.dialect.name == "postgresql":
+            return postgresql.insert(model.__table__)
+        return sqlite.insert(model.__table__)
+
+    def _comparable(self, column):
+        # PostgreSQL json has no equality operator, so compare its text form
+        if isinstance(column.type, JSON):
+            return cast(column, Text)
+        return column
+
+    def _bulk_upsert(
+        self, db: Session, model, rows: Iterable[Dict[str, Any]], key: str
+    ) -> set:
+        # INSERT ... ON CONFLICT DO UPDATE keyed on the model's unique column,
+        # so unchanged rows are rewritten in place rather than deleted and
+        # re-inserted, and readers never see an emptied table
+        stmt = self._insert(db, model)
+        updated = [column for column in stmt.excluded if column.name not in ("id", key)]
+        # Only rewrite rows whose values actually changed, so a refresh writes
+        # (and grows the WAL by) the delta rather than the whole catalog
+        changed = or_(
+            *(
+                self._comparable(model.__table__.c[column.name]).is_distinct_from(
+                    self._comparable(column)
+                )
+                for column in updated
+            )
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[key],
+            set_={column.name: column for column in updated},
+            where=changed,
+        )
+        # Returns the upserted keys so callers streaming rows can purge after
+        keys = set()
+        for batch in self._batches(model, rows):
+            db.execute(stmt, batch)
+            keys.update(row[key] for row in batch)
+        return keys
+
+    def _purge_missing(self, db: Session, model, key: str, keep, *criteria) -> None:
+        # Delete rows within the given scope whose key the API no longer returns
+        column = getattr(model, key)
+        keep = {str(value) for value in keep}
+        stale = [
+            value
+            for (value,) in db.query(column).filter(*criteria)
+            if str(value) not in keep
+        ]
+        for i in range(0, len(stale), 500):
+            db.query(model).filter(column.in_(stale[i : i + 500])).delete(
+                synchronize_session=False
+            )
 
     def query_api(
         self,
@@ -48,202 +525,72 @@ class CachedApiClient:
 
         if "player_api.php?username=" in url_path and "action=" not in url_path:
             # This is a user_info request, use database
-            return self._get_user_info_from_db(connection_info, force_refresh, db)
+            return self.get_user_info(connection_info, force_refresh, db)
 
         print(f"Fetching data from API for {url_path}")
-        response = requests.get(full_url)
+        response = self._session.get(full_url, timeout=API_TIMEOUT)
         response.raise_for_status()
-        data = response.json()
-        timestamp = datetime.now()
-        return data, timestamp, timestamp + timedelta(hours=24)
+        data = orjson.loads(response.content)
+        timestamp = utcnow()
+        return data, timestamp, timestamp + REFRESH_TTL
 
     def get_user_info(
         self,
         connection_info: ConnectionInfo,
         force_refresh: bool = False,
-        db: Session = Depends(get_db),
+        db: Session = None,
     ) -> Tuple[Dict[str, Any], datetime, datetime]:
-        refresh_data = (
-            db.query(RefreshData).filter(RefreshData.data_type == "user_info").first()
-        )
-        user_info = db.query(UserInfo).first()
-
-        if (
-            force_refresh
-            or not refresh_data
-            or not user_info
-            or datetime.utcnow() - refresh_data.last_refresh > timedelta(hours=24)
-        ):
-            # Fetch data from API
-            url = f"{connection_info.base_url}/player_api.php?username={connection_info.username}&password={connection_info.password}"
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-
-            # Update or create UserInfo
-            if not user_info:
-                user_info = UserInfo()
-
-            user_info.username = data["user_info"]["username"]
-            user_info.password = data["user_info"]["password"]
-            user_info.message = data["user_info"]["message"]
-            user_info.auth = data["user_info"]["auth"]
-            user_info.status = data["user_info"]["status"]
-            user_info.exp_date = data["user_info"]["exp_date"]
-            user_info.is_trial = data["user_info"]["is_trial"]
-            user_info.active_cons = data["user_info"]["active_cons"]
-            user_info.created_at = data["user_info"]["created_at"]
-            user_info.max_connections = data["user_info"]["max_connections"]
-            user_info.allowed_output_formats = data["user_info"][
-                "allowed_output_formats"
-            ]
-
-            user_info.server_url = data["server_info"]["url"]
-            user_info.server_port = data["server_info"]["port"]
-            user_info.server_https_port = data["server_info"]["https_port"]
-            user_info.server_protocol = data["server_info"]["server_protocol"]
-            user_info.server_rtmp_port = data["server_info"]["rtmp_port"]
-            user_info.server_timezone = data["server_info"]["timezone"]
-            user_info.server_timestamp_now = data["server_info"]["timestamp_now"]
-            user_info.server_time_now = data["server_info"]["time_now"]
-
-            db.add(user_info)
-
-            # Update or create RefreshData
-            if not refresh_data:
-                refresh_data = RefreshData(data_type="user_info")
-            refresh_data.last_refresh = datetime.utcnow()
-            db.add(refresh_data)
-
-            db.commit()
-            db.refresh(user_info)
-            db.refresh(refresh_data)
-
-        # Convert UserInfo object to dictionary
-        user_info_dict = {
-            "user_info": {
-                "username": user_info.username,
-                "password": user_info.password,
-                "message": user_info.message,
-                "auth": user_info.auth,
-                "status": user_info.status,
-                "exp_date": user_info.exp_date,
-                "is_trial": user_info.is_trial,
-                "active_cons": user_info.active_cons,
-                "created_at": user_info.created_at,
-                "max_connections": user_info.max_connections,
-                "allowed_output_formats": user_info.allowed_output_formats,
-            },
-            "server_info": {
-                "url": user_info.server_url,
-                "port": user_info.server_port,
-                "https_port": user_info.server_https_port,
-                "server_protocol": user_info.server_protocol,
-                "rtmp_port": user_info.server_rtmp_port,
-                "timezone": user_info.server_timezone,
-                "timestamp_now": user_info.server_timestamp_now,
-                "time_now": user_info.server_time_now,
-            },
-        }
-
-        return (
-            user_info_dict,
-            refresh_data.last_refresh,
-            refresh_data.last_refresh + timedelta(hours=24),
+        return self._memoized(
+            "user_info",
+            connection_info,
+            force_refresh,
+            db,
+            lambda: self._get_user_info_from_db(connection_info, force_refresh, db),
         )
 
     def _get_user_info_from_db(
-        self, connection_info: ConnectionInfo, force_refresh: bool, db: Session
+        self,
+        connection_info: ConnectionInfo,
+        force_refresh: bool,
+        db: Session,
     ) -> Tuple[Dict[str, Any], datetime, datetime]:
-        refresh_data = (
-            db.query(RefreshData).filter(RefreshData.data_type == "user_info").first()
-        )
+        refresh = self._get_refresh(db, "user_info")
         user_info = db.query(UserInfo).first()
 
-        if (
-            force_refresh
-            or not refresh_data
-            or not user_info
-            or datetime.utcnow() - refresh_data.last_refresh > timedelta(hours=24)
-        ):
+        if force_refresh or not user_info or self._is_stale(refresh):
             # Fetch data from API
-            url = f"{connection_info.base_url}/player_api.php?username={connection_info.username}&password={connection_info.password}"
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-
-            # Update or create UserInfo
-            if not user_info:
-                user_info = UserInfo()
-
-            # Update user_info fields
-            user_info.username = data["user_info"]["username"]
-            user_info.password = data["user_info"]["password"]
-            user_info.message = data["user_info"]["message"]
-            user_info.auth = data["user_info"]["auth"]
-            user_info.status = data["user_info"]["status"]
-            user_info.exp_date = data["user_info"]["exp_date"]
-            user_info.is_trial = data["user_info"]["is_trial"]
-            user_info.active_cons = data["user_info"]["active_cons"]
-            user_info.created_at = data["user_info"]["created_at"]
-            user_info.max_connections = data["user_info"]["max_connections"]
-            user_info.allowed_output_formats = data["user_info"][
-                "allowed_output_formats"
-            ]
+            url = _api_url(connection_info)
+            response = self._fetch(url, refresh, force_refresh or not user_info)
+            if response is None:
+                # Upstream unchanged since the last refresh, keep the stored rows
+                refresh = self._mark_refreshed(db, "user_info")
+            else:
+                data = orjson.loads(response.content)
 
-            # Update server_info fields
-            user_info.server_url = data["server_info"]["url"]
-            user_info.server_port = data["server_info"]["port"]
-            user_info.server_https_port = data["server_info"]["https_port"]
-            user_info.server_protocol = data["server_info"]["server_protocol"]
-            user_info.server_rtmp_port = data["server_info"]["rtmp_port"]
-            user_info.server_timezone = data["server_info"]["timezone"]
-            user_info.server_timestamp_now = data["server_info"]["timestamp_now"]
-            user_info.server_time_now = data["server_info"]["time_now"]
+                # Update or create UserInfo
+                if not user_info:
+                    user_info = UserInfo()
 
-            db.add(user_info)
+                for attr, (section, key) in USER_INFO_FIELDS.items():
+                    value = data[section][key]
+                    # Only touch changed fields so unchanged rows don't emit an UPDATE
+                    if getattr(user_info, attr) != value:
+                        setattr(user_info, attr, value)
 
-            # Update or create RefreshData
-            if not refresh_data:
-                refresh_data = RefreshData(data_type="user_info")
-            refresh_data.last_refresh = datetime.utcnow()
-            db.add(refresh_data)
+                db.add(user_info)
 
-            db.commit()
-            db.refresh(user_info)
-            db.refresh(refresh_data)
+                # Record the refresh and commit
+                refresh = self._mark_refreshed(db, "user_info", response)
 
         # Convert UserInfo object to dictionary
-        user_info_dict = {
-            "user_info": {
-                "username": user_info.username,
-                "password": user_info.password,
-                "message": user_info.message,
-                "auth": user_info.auth,
-                "status": user_info.status,
-                "exp_date": user_info.exp_date,
-                "is_trial": user_info.is_trial,
-                "active_cons": user_info.active_cons,
-                "created_at": user_info.created_at,
-                "max_connections": user_info.max_connections,
-                "allowed_output_formats": user_info.allowed_output_formats,
-            },
-            "server_info": {
-                "url": user_info.server_url,
-                "port": user_info.server_port,
-                "https_port": user_info.server_https_port,
-                "server_protocol": user_info.server_protocol,
-                "rtmp_port": user_info.server_rtmp_port,
-                "timezone": user_info.server_timezone,
-                "timestamp_now": user_info.server_timestamp_now,
-                "time_now": user_info.server_time_now,
-            },
-        }
+        user_info_dict = {"user_info": {}, "server_info": {}}
+        for attr, (section, key) in USER_INFO_FIELDS.items():
+            user_info_dict[section][key] = getattr(user_info, attr)
 
         return (
             user_info_dict,
-            refresh_data.last_refresh,
-            refresh_data.last_refresh + timedelta(hours=24),
+            refresh.last_refresh,
+            refresh.expires_at,
         )
 
     def get_live_category(
@@ -252,121 +599,64 @@ class CachedApiClient:
         force_refresh: bool = False,
         db: Session = None,
     ) -> Tuple[List[Dict[str, Any]], datetime, datetime]:
-        refresh_data = (
-            db.query(RefreshData)
-            .filter(RefreshData.data_type == "live_categories")
-            .first()
-        )
-
-        if (
-            force_refresh
-            or not refresh_data
-            or datetime.utcnow() - refresh_data.last_refresh > timedelta(hours=24)
-        ):
-            # Fetch data from API
-            url = f"{connection_info.base_url}/player_api.php?username={connection_info.username}&password={connection_info.password}&action=get_live_categories"
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-
-            # Clear existing live categories
-            db.query(LiveCategory).delete()
-
-            # Add new live categories
-            for category in data:
-                new_category = LiveCategory(
-                    category_id=category["category_id"],
-                    category_name=category["category_name"],
-                    parent_id=category["parent_id"],
-                )
-                db.add(new_category)
-
-            # Update or create RefreshData
-            if not refresh_data:
-                refresh_data = RefreshData(data_type="live_categories")
-            refresh_data.last_refresh = datetime.utcnow()
-            db.add(refresh_data)
-
-            db.commit()
-            db.refresh(refresh_data)
-
-        # Fetch live categories from database
-        live_categories = db.query(LiveCategory).all()
-
-        # Convert LiveCategory objects to dictionary
-        live_categories_list = [
-            {
-                "category_id": category.category_id,
-                "category_name": category.category_name,
-                "parent_id": category.parent_id,
-            }
-            for category in live_categories
-        ]
-
-        return (
-            live_categories_list,
-            refresh_data.last_refresh,
-            refresh_data.last_refresh + timedelta(hours=24),
+        return self._memoized(
+            "live_categories",
+            connection_info,
+            force_refresh,
+            db,
+            lambda: self._get_live_categories_from_db(
+                connection_info, force_refresh, db
+            ),
         )
 
     def _get_live_categories_from_db(
         self, connection_info: ConnectionInfo, force_refresh: bool, db: Session
     ) -> Tuple[List[Dict[str, Any]], datetime, datetime]:
-        refresh_data = (
-            db.query(RefreshData)
-            .filter(RefreshData.data_type == "live_categories")
-            .first()
-        )
+        refresh = self._get_refresh(db, "live_categories")
 
-        if (
-            force_refresh
-            or not refresh_data
-            or datetime.utcnow() - refresh_data.last_refresh > timedelta(hours=24)
-        ):
+        if force_refresh or self._is_stale(refresh):
             # Fetch data from API
-            url = f"{connection_info.base_url}/player_api.php?username={connection_info.username}&password={connection_info.password}&action=get_live_categories"
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-
-            # Clear existing live categories
-            db.query(LiveCategory).delete()
-
-            # Add new live categories
-            for category in data:
-                new_category = LiveCategory(
-                    category_id=category["category_id"],
-                    category_name=category["category_name"],
-                    parent_id=category["parent_id"],
+            url = _api_url(connection_info, "get_live_categories")
+            response = self._fetch(url, refresh, force_refresh)
+            if response is None:
+                # Upstream unchanged since the last refresh, keep the stored rows
+                refresh = self._mark_refreshed(db, "live_categories")
+            else:
+                data = orjson.loads(response.content)
+
+                # Upsert live categories, then drop any the API no longer lists
+                rows = [
+                    {
+                        "category_id": category["category_id"],
+                        "category_name": category["category_name"],
+                        "parent_id": category["parent_id"],
+                    }
+                    for category in data
+                ]
+                self._bulk_upsert(db, LiveCategory, rows, "category_id")
+                self._purge_missing(
+                    db, LiveCategory, "category_id", {r["category_id"] for r in rows}
                 )
-                db.add(new_category)
-
-            # Update or create RefreshData
-            if not refresh_data:
-                refresh_data = RefreshData(data_type="live_categories")
-            refresh_data.last_refresh = datetime.utcnow()
-            db.add(refresh_data)
 
-            db.commit()
-            db.refresh(refresh_data)
+                # Record the refresh and commit
+                refresh = self._mark_refreshed(db, "live_categories", response)
 
-        # Fetch live categories from database
-        live_categories = db.query(LiveCategory).all()
-
-        # Convert LiveCategory objects to dictionary
+        # Fetch live categories from database as plain row mappings
         live_categories_list = [
-            {
-                "category_id": category.category_id,
-                "category_name": category.category_name,
-                "parent_id": category.parent_id,
-            }
-            for category in live_categories
+            dict(row)
+            for row in db.execute(
+                select(
+                    LiveCategory.category_id,
+                    LiveCategory.category_name,
+                    LiveCategory.parent_id,
+                )
+            ).mappings()
         ]
 
         return (
             live_categories_list,
-            refresh_data.last_refresh,
-            refresh_data.last_refresh + timedelta(hours=24),
+            refresh.last_refresh,
+            refresh.expires_at,
         )
 
     def _get_live_channels_from_db(
@@ -376,84 +666,58 @@ class CachedApiClient:
         force_refresh: bool,
         db: Session,
     ) -> List[Dict[str, Any]]:
-        refresh_data = (
-            db.query(RefreshData)
-            .filter(RefreshData.data_type == f"live_channels_{category_id}")
-            .first()
-        )
+        refresh = self._get_refresh(db, f"live_channels_{category_id}")
 
-        if (
-            force_refresh
-            or not refresh_data
-            or datetime.utcnow() - refresh_data.last_refresh > timedelta(hours=24)
-        ):
+        if force_refresh or self._is_stale(refresh):
             # Fetch data from API
-            url = f"{connection_info.base_url}/player_api.php?username={connection_info.username}&password={connection_info.password}&action=get_live_streams&category_id={category_id}"
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-
-            # Clear existing live channels for this category
-            db.query(LiveChannel).filter(
-                LiveChannel.category_id == str(category_id)
-            ).delete()
-
-            # Add new live channels
-            for channel in data:
-                new_channel = LiveChannel(
-                    num=channel["num"],
-                    name=channel["name"],
-                    stream_type=channel["stream_type"],
-                    stream_id=channel["stream_id"],
-                    stream_icon=channel["stream_icon"],
-                    epg_channel_id=channel.get("epg_channel_id", ""),
-                    added=channel["added"],
-                    category_id=str(category_id),
-                    custom_sid=channel.get("custom_sid", ""),
-                    tv_archive=channel.get("tv_archive", 0),
-                    direct_source=channel.get("direct_source", ""),
-                    tv_archive_duration=channel.get("tv_archive_duration", 0),
+            url = _api_url(connection_info, "get_live_streams", category_id=category_id)
+            response = self._fetch(url, refresh, force_refresh, stream=True)
+            if response is None:
+                # Upstream unchanged since the last refresh, keep the stored rows
+                refresh = self._mark_refreshed(db, f"live_channels_{category_id}")
+            else:
+                # Upsert live channels, then drop any gone from this category
+                stream_ids = self._bulk_upsert(
+                    db,
+                    LiveChannel,
+                    (
+                        self._live_channel_row(channel, str(category_id))
+                        for channel in self._stream_items(response)
+                    ),
+                    "stream_id",
+                )
+                self._purge_missing(
+                    db,
+                    LiveChannel,
+                    "stream_id",
+                    stream_ids,
+                    LiveChannel.category_id == str(category_id),
                 )
-                db.add(new_channel)
-
-            # Update or create RefreshData
-            if not refresh_data:
-                refresh_data = RefreshData(data_type=f"live_channels_{category_id}")
-            refresh_data.last_refresh = datetime.utcnow()
-            db.add(refresh_data)
 
-            db.commit()
+                # Record the refresh and commit
+                refresh = self._mark_refreshed(
+                    db, f"live_channels_{category_id}", response
+                )
 
-        # Fetch live channels from database
-        live_channels = (
-            db.query(LiveChannel)
-            .filter(LiveChannel.category_id == str(category_id))
-            .all()
+        # Stream live channels from the database in batches, selecting only
+        # the columns needed
+        result = db.execute(
+            LIVE_CHANNELS_BY_CATEGORY, {"category_id": str(category_id)}
         )
 
-        # Convert LiveChannel objects to dictionary and add computed fields
+        # Add computed fields to each row, hoisting loop invariants
+        play_prefix = f"{connection_info.base_url}/live/{connection_info.username}/{connection_info.password}/"
         live_channels_list = []
-        for channel in live_channels:
-            channel_dict = {
-                "num": channel.num,
-                "name": channel.name,
-                "stream_type": channel.stream_type,
-                "stream_id": channel.stream_id,
-                "stream_icon": channel.stream_icon,
-                "epg_channel_id": channel.epg_channel_id,
-                "added": channel.added,
-                "category_id": channel.category_id,
-                "custom_sid": channel.custom_sid,
-                "tv_archive": channel.tv_archive,
-                "direct_source": channel.direct_source,
-                "tv_archive_duration": channel.tv_archive_duration,
-                "added_date": datetime.fromtimestamp(int(channel.added)).strftime(
-                    "%Y-%m-%d %H:%M:%S"
-                ),
-                "play_link": f"{connection_info.base_url}/live/{connection_info.username}/{connection_info.password}/{channel.stream_id}.ts",
-                "cached_icon": cache_icon(channel.stream_icon),
-            }
-            live_channels_list.append(channel_dict)
+        for rows in result.partitions():
+            cached_icons = cache_icons([row.stream_icon for row in rows])
+            for row, cached_icon in zip(rows, cached_icons):
+                channel = dict(zip(LIVE_CHANNEL_KEYS, row))
+                if row.added_date is None:
+                    # Stored before added_date existed; filled on next refresh
+                    channel["added_date"] = _format_added(row.added)
+                channel["play_link"] = f"{play_prefix}{row.stream_id}.ts"
+                channel["cached_icon"] = cached_icon
+                live_channels_list.append(channel)
 
         return live_channels_list
 
@@ -463,140 +727,118 @@ class CachedApiClient:
         force_refresh: bool = False,
         db: Session = None,
     ) -> Tuple[List[Dict[str, Any]], datetime, datetime]:
-        refresh_data = (
-            db.query(RefreshData)
-            .filter(RefreshData.data_type == "all_live_streams")
-            .first()
+        return self._memoized(
+            "all_live_streams",
+            connection_info,
+            force_refresh,
+            db,
+            lambda: self._get_all_live_streams_from_db(
+                connection_info, force_refresh, db
+            ),
         )
 
-        if (
-            force_refresh
-            or not refresh_data
-            or datetime.utcnow() - refresh_data.last_refresh > timedelta(hours=24)
-        ):
-            url = f"{connection_info.base_url}/player_api.php?username={connection_info.username}&password={connection_info.password}&action=get_live_streams"
-            try:
-                response = requests.get(url)
-                response.raise_for_status()
-                data = response.json()
+    def _get_all_live_streams_from_db(
+        self,
+        connection_info: ConnectionInfo,
+        force_refresh: bool = False,
+        db: Session = None,
+    ) -> Tuple[List[Dict[str, Any]], datetime, datetime]:
+        refresh = self._get_refresh(db, "all_live_streams")
+        if force_refresh or self._is_stale(refresh):
+            refresh = self._refresh_all_live_streams(
+                connection_info, refresh, force_refresh, db
+            )
+
+        # Fetch all live streams from database as column tuples
+        stream_list = [
+            dict(zip(LIVE_CHANNEL_KEYS, row))
+            for row in db.execute(select(*LIVE_CHANNEL_COLUMNS))
+        ]
+        logger.info(f"Retrieved {len(stream_list)} live streams from database")
 
-                logger.info(f"Fetched {len(data)} live streams from API")
+        return (
+            stream_list,
+            refresh.last_refresh,
+            refresh.expires_at,
+        )
 
+    def _refresh_all_live_streams(
+        self,
+        connection_info: ConnectionInfo,
+        refresh: Optional[RefreshState],
+        force_refresh: bool,
+        db: Session,
+    ) -> RefreshState:
+        url = _api_url(connection_info, "get_live_streams")
+        try:
+            response = self._fetch(url, refresh, force_refresh, stream=True)
+            if response is None:
+                # Upstream unchanged since the last refresh, keep the stored rows
+                refresh = self._mark_refreshed(db, "all_live_streams")
+            else:
                 try:
-                    # Clear existing live streams
-                    deleted_count = db.query(LiveChannel).delete()
-                    logger.info(
-                        f"Cleared {deleted_count} existing live streams from database"
+                    # Upsert all live streams as they stream in from the API,
+                    # then drop any the API no longer lists
+                    stream_ids = self._bulk_upsert(
+                        db,
+                        LiveChannel,
+                        map(self._live_channel_row, self._stream_items(response)),
+                        "stream_id",
                     )
-
-                    # Add new live streams in batches
-                    new_stream_count = 0
-                    batch_size = 500
-                    for i in range(0, len(data), batch_size):
-                        batch = data[i : i + batch_size]
-                        stream_objects = []
-                        for stream in batch:
-                            new_stream = LiveChannel(
-                                num=stream["num"],
-                                name=stream["name"],
-                                stream_type=stream["stream_type"],
-                                stream_id=stream["stream_id"],
-                                stream_icon=stream["stream_icon"],
-                                epg_channel_id=stream.get("epg_channel_id", ""),
-                                added=stream["added"],
-                                category_id=stream["category_id"],
-                                custom_sid=stream.get("custom_sid", ""),
-                                tv_archive=stream.get("tv_archive", 0),
-                                direct_source=stream.get("direct_source", ""),
-                                tv_archive_duration=stream.get(
-                                    "tv_archive_duration", 0
-                                ),
-                            )
-                            stream_objects.append(new_stream)
-
-                        db.bulk_save_objects(stream_objects)
-                        db.flush()
-                        new_stream_count += len(stream_objects)
-                        logger.info(
-                            f"Added batch of {len(stream_objects)} live streams. Total: {new_stream_count}"
-                        )
+                    self._purge_missing(db, LiveChannel, "stream_id", stream_ids)
 
                     logger.info(
-                        f"Finished adding {new_stream_count} new live streams to database"
+                        f"Finished adding {len(stream_ids)} live streams to database"
                     )
 
-                    # Update or create RefreshData
-                    if not refresh_data:
-                        refresh_data = RefreshData(data_type="all_live_streams")
-                    refresh_data.last_refresh = datetime.utcnow()
-                    db.add(refresh_data)
-
-                    db.commit()
+                    # Record the refresh and commit
+                    refresh = self._mark_refreshed(db, "all_live_streams", response)
+                    self._optimize(db)
                     logger.info("Successfully committed all changes to database")
 
                 except SQLAlchemyError as e:
                     logger.error(f"Error updating database: {str(e)}")
                     raise
 
-            except requests.RequestException as e:
-                logger.error(f"Error fetching data from API: {str(e)}")
-                raise
-
-        # Fetch all live streams from database
-        all_streams = db.query(LiveChannel).all()
-        logger.info(f"Retrieved {len(all_streams)} live streams from database")
-
-        # Convert LiveChannel objects to dictionary
-        stream_list = [
-            {
-                "num": stream.num,
-                "name": stream.name,
-                "stream_type": stream.stream_type,
-                "stream_id": stream.stream_id,
-                "stream_icon": stream.stream_icon,
-                "epg_channel_id": stream.epg_channel_id,
-                "added": stream.added,
-                "category_id": stream.category_id,
-                "custom_sid": stream.custom_sid,
-                "tv_archive": stream.tv_archive,
-                "direct_source": stream.direct_source,
-                "tv_archive_duration": stream.tv_archive_duration,
-            }
-            for stream in all_streams
-        ]
-
-        return (
-            stream_list,
-            refresh_data.last_refresh,
-            refresh_data.last_refresh + timedelta(hours=24),
-        )
+        except requests.RequestException as e:
+            logger.error(f"Error fetching data from API: {str(e)}")
+            raise
+        return refresh
 
     def fetch_and_store_series_categories(
         self,
         connection_info: ConnectionInfo,
         db: Session,
-    ) -> List[SeriesCategory]:
-        url = f"{connection_info.base_url}/player_api.php?username={connection_info.username}&password={connection_info.password}&action=get_series_categories"
+        pending: Optional[Future] = None,
+    ) -> List[Dict[str, Any]]:
+        url = _api_url(connection_info, "get_series_categories")
         try:
-            response = requests.get(url)
+            # Use a response already requested in the background, if given
+            if pending is not None:
+                response = pending.result()
+            else:
+                response = self._session.get(url, timeout=API_TIMEOUT)
             response.raise_for_status()
-            categories_data = response.json()
+            categories_data = orjson.loads(response.content)
 
             logger.info(f"Fetched {len(categories_data)} series categories from API")
 
-            # Clear existing categories
-            db.query(SeriesCategory).delete()
-
-            # Add new categories
-            categories = []
-            for category_data in categories_data:
-                new_category = SeriesCategory(
-                    category_id=category_data["category_id"],
-                    category_name=category_data["category_name"],
-                    parent_id=category_data.get("parent_id", 0),
-                )
-                db.add(new_category)
-                categories.append(new_category)
+            # Upsert categories, then drop any the API no longer lists
+            categories = [
+                {
+                    "category_id": category_data["category_id"],
+                    "category_name": category_data["category_name"],
+                    "parent_id": category_data.get("parent_id", 0),
+                }
+                for category_data in categories_data
+            ]
+            self._bulk_upsert(db, SeriesCategory, categories, "category_id")
+            self._purge_missing(
+                db,
+                SeriesCategory,
+                "category_id",
+                {c["category_id"] for c in categories},
+            )
 
             db.commit()
             logger.info(f"Stored {len(categories)} series categories in the database")
@@ -617,42 +859,40 @@ class CachedApiClient:
         force_refresh: bool = False,
         db: Session = None,
     ) -> Tuple[List[Dict[str, Any]], datetime, datetime]:
-        refresh_data = (
-            db.query(RefreshData)
-            .filter(RefreshData.data_type == "series_categories")
-            .first()
+        return self._memoized(
+            "series_categories",
+            connection_info,
+            force_refresh,
+            db,
+            lambda: self._get_series_categories_from_db(
+                connection_info, force_refresh, db
+            ),
         )
 
-        if (
-            force_refresh
-            or not refresh_data
-            or datetime.utcnow() - refresh_data.last_refresh > timedelta(hours=24)
-        ):
-            categories = self.fetch_and_store_series_categories(connection_info, db)
-            fetch_time = datetime.utcnow()
+    def _get_series_categories_from_db(
+        self,
+        connection_info: ConnectionInfo,
+        force_refresh: bool = False,
+        db: Session = None,
+    ) -> Tuple[List[Dict[str, Any]], datetime, datetime]:
+        refresh = self._get_refresh(db, "series_categories")
 
-            if not refresh_data:
-                refresh_data = RefreshData(data_type="series_categories")
-            refresh_data.last_refresh = fetch_time
-            db.add(refresh_data)
-            db.commit()
+        if force_refresh or self._is_stale(refresh):
+            categories = self.fetch_and_store_series_categories(connection_info, db)
+            refresh = self._mark_refreshed(db, "series_categories")
         else:
-            categories = db.query(SeriesCategory).all()
-            fetch_time = refresh_data.last_refresh
-
-        expiry_time = fetch_time + timedelta(hours=24)
-
-        # Convert SeriesCategory objects to dictionary
-        series_categories_list = [
-            {
-                "category_id": category.category_id,
-                "category_name": category.category_name,
-                "parent_id": category.parent_id,
-            }
-            for category in categories
-        ]
+            categories = [
+                dict(row)
+                for row in db.execute(
+                    select(
+                        SeriesCategory.category_id,
+                        SeriesCategory.category_name,
+                        SeriesCategory.parent_id,
+                    )
+                ).mappings()
+            ]
 
-        return series_categories_list, fetch_time, expiry_time
+        return categories, refresh.last_refresh, refresh.expires_at
 
     def get_series_by_category(
         self,
@@ -661,45 +901,46 @@ class CachedApiClient:
         force_refresh: bool = False,
         db: Session = None,
     ) -> List[Dict[str, Any]]:
-        # Check if we have series for this category in the database
-        existing_series = (
-            db.query(Series).filter(Series.category_id == str(category_id)).all()
-        )
+        if force_refresh:
+            return self._get_series_from_db(connection_info, category_id, True, db)
+
+        # Check cheaply whether we have series for this category before loading them
+        has_series = db.execute(
+            select(Series.id).where(Series.category_id == str(category_id)).limit(1)
+        ).first()
 
-        if existing_series and not force_refresh:
+        if has_series:
+            series_data = self._convert_series_to_dict(
+                self._stream_series(db, category_id)
+            )
             logger.info(
-                f"Retrieved {len(existing_series)} series for category {category_id} from database"
+                f"Retrieved {len(series_data)} series for category {category_id} from database"
             )
-            return self._convert_series_to_dict(existing_series)
+            return series_data
 
-        # If no existing series or force refresh, fetch from API
-        return self._get_series_from_db(connection_info, category_id, force_refresh, db)
+        # If no existing series, fetch from API; the refresh check inside lets
+        # requests that waited on the lock read what the first one stored
+        with self._flight_lock(f"series_{category_id}"):
+            return self._get_series_from_db(connection_info, category_id, False, db)
 
-    def _convert_series_to_dict(self, series_list):
-        return [
-            {
-                "num": 1,  # This field is not in the database, so we're setting a default value
-                "name": series.name,
-                "series_id": series.series_id,
-                "cover": series.cover,
-                "plot": series.plot,
-                "cast": series.cast,
-                "director": series.director,
-                "genre": series.genre,
-                "releaseDate": series.release_date,
-                "last_modified": series.last_modified,
-                "rating": series.rating,
-                "rating_5based": series.rating_5based,
-                "backdrop_path": series.backdrop_path,
-                "youtube_trailer": series.youtube_trailer,
-                "episode_run_time": series.episode_run_time,
-                "category_id": series.category_id,
-                "added_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "cached_cover": cache_icon(series.cover),
-                "release_date": series.release_date,
-            }
-            for series in series_list
-        ]
+    def _stream_series(self, db: Session, category_id: int):
+        return db.execute(SERIES_BY_CATEGORY, {"category_id": str(category_id)})
+
+    def _convert_series_to_dict(self, series_result):
+        added_date = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        series_data = []
+        for rows in series_result.partitions():
+            cached_covers = cache_icons([row.cover for row in rows])
+            for row, cached_cover in zip(rows, cached_covers):
+                series = dict(zip(SERIES_KEYS, row))
+                series["num"] = (
+                    1  # This field is not in the database, so we're setting a default value
+                )
+                series["releaseDate"] = row.release_date
+                series["added_date"] = added_date
+                series["cached_cover"] = cached_cover
+                series_data.append(series)
+        return series_data
 
     def _get_series_from_db(
         self,
@@ -708,86 +949,41 @@ class CachedApiClient:
         force_refresh: bool,
         db: Session,
     ) -> List[Dict[str, Any]]:
-        refresh_data = (
-            db.query(RefreshData)
-            .filter(RefreshData.data_type == f"series_{category_id}")
-            .first()
-        )
+        refresh = self._get_refresh(db, f"series_{category_id}")
 
-        if (
-            force_refresh
-            or not refresh_data
-            or datetime.utcnow() - refresh_data.last_refresh > timedelta(hours=24)
-        ):
+        if force_refresh or self._is_stale(refresh):
             # Fetch data from API
-            url = f"{connection_info.base_url}/player_api.php?username={connection_info.username}&password={connection_info.password}&action=get_series&category_id={category_id}"
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-
-            # Clear existing series for this category
-            db.query(Series).filter(Series.category_id == str(category_id)).delete()
-
-            # Add new series
-            for series in data:
-                new_series = Series(
-                    series_id=series["series_id"],
-                    name=series["name"],
-                    cover=series["cover"],
-                    plot=series["plot"],
-                    cast=series["cast"],
-                    director=series["director"],
-                    genre=series["genre"],
-                    release_date=series["releaseDate"],
-                    last_modified=series["last_modified"],
-                    rating=series["rating"],
-                    rating_5based=series["rating_5based"],
-                    backdrop_path=series["backdrop_path"],
-                    youtube_trailer=series["youtube_trailer"],
-                    episode_run_time=series["episode_run_time"],
-                    category_id=str(category_id),
+            url = _api_url(connection_info, "get_series", category_id=category_id)
+            response = self._fetch(url, refresh, force_refresh, stream=True)
+            if response is None:
+                # Upstream unchanged since the last refresh, keep the stored rows
+                refresh = self._mark_refreshed(db, f"series_{category_id}")
+            else:
+                # Upsert series as they stream in, then drop any gone from
+                # this category
+                series_ids = self._bulk_upsert(
+                    db,
+                    Series,
+                    (
+                        self._series_row(series, str(category_id))
+                        for series in self._stream_items(response)
+                    ),
+                    "series_id",
+                )
+                self._purge_missing(
+                    db,
+                    Series,
+                    "series_id",
+                    series_ids,
+                    Series.category_id == str(category_id),
                 )
-                db.add(new_series)
-
-            # Update or create RefreshData
-            if not refresh_data:
-                refresh_data = RefreshData(data_type=f"series_{category_id}")
-            refresh_data.last_refresh = datetime.utcnow()
-            db.add(refresh_data)
 
-            db.commit()
+                # Record the refresh and commit
+                refresh = self._mark_refreshed(db, f"series_{category_id}", response)
 
         # Fetch series from database
-        series_list = (
-            db.query(Series).filter(Series.category_id == str(category_id)).all()
-        )
-        logger.info(f"Fetched {len(series_list)} series from DB")
-
-        # Convert Series objects to dictionary and add computed fields
-        series_data = []
-        for series in series_list:
-            series_dict = {
-                "num": 1,  # This field is not in the database, so we're setting a default value
-                "name": series.name,
-                "series_id": series.series_id,
-                "cover": series.cover,
-                "plot": series.plot,
-                "cast": series.cast,
-                "director": series.director,
-                "genre": series.genre,
-                "releaseDate": series.release_date,
-                "last_modified": series.last_modified,
-                "rating": series.rating,
-                "rating_5based": series.rating_5based,
-                "backdrop_path": series.backdrop_path,
-                "youtube_trailer": series.youtube_trailer,
-                "episode_run_time": series.episode_run_time,
-                "category_id": series.category_id,
-                "added_date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                "cached_cover": cache_icon(series.cover),
-                "release_date": series.release_date,
-            }
-            series_data.append(series_dict)
+        series_data = self._convert_series_to_dict(self._stream_series(db, category_id))
+        logger.info(f"Fetched {len(series_data)} series from DB")
 
         return series_data
 
@@ -801,10 +997,166 @@ class CachedApiClient:
         if db is None:
             logger.error("Database session is None in get_series_streams_by_series")
             raise HTTPException(status_code=500, detail="Database session error")
-        return self._get_series_streams_from_db(
-            connection_info, series_id, force_refresh, db
+        return self._memoized(
+            f"series_streams_{series_id}",
+            connection_info,
+            force_refresh,
+            db,
+            lambda: self._prepare_details(
+                self._get_series_streams_from_db(
+                    connection_info, series_id, force_refresh, db
+                )
+            ),
         )
 
+    def _live_channel_row(
+        self, channel: Dict[str, Any], category_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return {
+            "num": channel["num"],
+            "name": channel["name"],
+            "stream_type": channel["stream_type"],
+            "stream_id": channel["stream_id"],
+            "stream_icon": channel["stream_icon"],
+            "epg_channel_id": channel.get("epg_channel_id", ""),
+            "added": channel["added"],
+            "added_date": _format_added(channel["added"]),
+            "category_id": category_id or channel["category_id"],
+            "custom_sid": channel.get("custom_sid", ""),
+            "tv_archive": channel.get("tv_archive", 0),
+            "direct_source": channel.get("direct_source", ""),
+            "tv_archive_duration": channel.get("tv_archive_duration", 0),
+        }
+
+    def _film_stream_row(
+        self, film: Dict[str, Any], category_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return {
+            "num": film["num"],
+            "name": film["name"],
+            "stream_type": film["stream_type"],
+            "stream_id": film["stream_id"],
+            "stream_icon": film["stream_icon"],
+            "rating": film["rating"],
+            "rating_5based": film["rating_5based"],
+            "added": film["added"],
+            "added_date": _format_added(film["added"]),
+            "category_id": category_id or film["category_id"],
+            "container_extension": film["container_extension"],
+            "custom_sid": film.get("custom_sid", ""),
+            "direct_source": film.get("direct_source", ""),
+        }
+
+    def _series_row(
+        self, series: Dict[str, Any], category_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return {
+            "series_id": series["series_id"],
+            "category_id": category_id or series["category_id"],
+            "name": series["name"],
+            "cover": series["cover"],
+            "plot": series.get("plot", ""),
+            "cast": series.get("cast", ""),
+            "director": series.get("director", ""),
+            "genre": series.get("genre", ""),
+            "release_date": series.get("releaseDate", ""),
+            "last_modified": series.get("last_modified", ""),
+            "rating": series.get("rating", ""),
+            "rating_5based": series.get("rating_5based", 0.0),
+            "backdrop_path": series.get("backdrop_path", []),
+            "youtube_trailer": series.get("youtube_trailer", ""),
+            "episode_run_time": series.get("episode_run_time", ""),
+        }
+
+    def _stream_items(self, response: requests.Response) -> Iterator[Dict[str, Any]]:
+        # Parse JSON array items as the body arrives instead of buffering it.
+        # Anything other than an array (e.g. an auth failure object) or a
+        # malformed body raises, so callers never purge rows after a refresh
+        # that yielded nothing
+        items = ijson.sendable_list()
+        coro = ijson.items_coro(items, "item", use_float=True)
+        started = False
+        try:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                if not started:
+                    head = chunk.lstrip()
+                    if not head:
+                        continue
+                    if not head.startswith(b"["):
+                        raise requests.exceptions.InvalidJSONError(
+                            f"Expected a JSON array from {response.url}",
+                            response=response,
+                        )
+                    started = True
+                coro.send(chunk)
+                yield from items
+                del items[:]
+            if not started:
+                raise requests.exceptions.InvalidJSONError(
+                    f"Empty response from {response.url}", response=response
+                )
+            coro.close()
+        except ijson.JSONError as e:
+            raise requests.exceptions.InvalidJSONError(
+                f"Malformed JSON from {response.url}: {e}", response=response
+            ) from e
+        yield from items
+
+    def _stream_episode_rows(
+        self,
+        response: requests.Response,
+        series_id: int,
+        info_items: List[Dict[str, Any]],
+    ) -> Iterator[Dict[str, Any]]:
+        # Same guards as _stream_items: a body that isn't a JSON object, or is
+        # empty or malformed, raises before the caller commits the new rows
+        seasons = ijson.sendable_list()
+        episodes_coro = ijson.kvitems_coro(seasons, "episodes", use_float=True)
+        info_coro = ijson.items_coro(info_items, "info", use_float=True)
+        started = False
+        try:
+            for chunk in response.iter_content(chunk_size=64 * 1024):
+                if not started:
+                    head = chunk.lstrip()
+                    if not head:
+                        continue
+                    if not head.startswith(b"{"):
+                        raise requests.exceptions.InvalidJSONError(
+                            f"Expected a JSON object from {response.url}",
+                            response=response,
+                        )
+                    started = True
+                episodes_coro.send(chunk)
+                info_coro.send(chunk)
+                for season, episodes in seasons:
+                    for episode in episodes:
+                        yield {
+                            "series_id": series_id,
+                            "season": int(season),
+                            "episode": episode["episode_num"],
+                            "title": episode["title"],
+                            "container_extension": episode["container_extension"],
+                            "plot": episode.get("plot", ""),
+                            "duration": episode.get("duration", ""),
+                            "rating": episode.get("rating", 0.0),
+                            "info": episode.get("info", {}),
+                        }
+                del seasons[:]
+            if not started:
+                raise requests.exceptions.InvalidJSONError(
+                    f"Empty response from {response.url}", response=response
+                )
+            episodes_coro.close()
+            info_coro.close()
+        except ijson.JSONError as e:
+            raise requests.exceptions.InvalidJSONError(
+                f"Malformed JSON from {response.url}: {e}", response=response
+            ) from e
+        if not info_items:
+            raise requests.exceptions.InvalidJSONError(
+                f"No series info in response from {response.url}", response=response
+            )
+
     def _get_series_streams_from_db(
         self,
         connection_info: ConnectionInfo,
@@ -812,75 +1164,63 @@ class CachedApiClient:
         force_refresh: bool,
         db: Session,
     ) -> Tuple[Dict[str, Any], datetime, datetime]:
-        refresh_data = (
-            db.query(RefreshData)
-            .filter(RefreshData.data_type == f"series_streams_{series_id}")
-            .first()
-        )
+        refresh = self._get_refresh(db, f"series_streams_{series_id}")
 
-        if (
-            force_refresh
-            or not refresh_data
-            or datetime.utcnow() - refresh_data.last_refresh > timedelta(hours=24)
-        ):
+        if force_refresh or self._is_stale(refresh):
             # Fetch data from API
-            url = f"{connection_info.base_url}/player_api.php?username={connection_info.username}&password={connection_info.password}&action=get_series_info&series_id={series_id}"
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-
-            # Clear existing episodes for this series
-            db.query(SeriesEpisode).filter(
-                SeriesEpisode.series_id == series_id
-            ).delete()
-
-            # Add new episodes
-            for season, episodes in data.get("episodes", {}).items():
-                for episode in episodes:
-                    new_episode = SeriesEpisode(
-                        series_id=series_id,
-                        season=int(season),
-                        episode=episode["episode_num"],
-                        title=episode["title"],
-                        container_extension=episode["container_extension"],
-                        plot=episode.get("plot", ""),
-                        duration=episode.get("duration", ""),
-                        rating=episode.get("rating", 0.0),
-                        info=episode.get("info", {}),
+            url = _api_url(connection_info, "get_series_info", series_id=series_id)
+            response = self._fetch(url, refresh, force_refresh, stream=True)
+            if response is None:
+                # Upstream unchanged since the last refresh, keep the stored rows
+                refresh = self._mark_refreshed(db, f"series_streams_{series_id}")
+            else:
+
+                # Clear existing episodes for this series
+                db.query(SeriesEpisode).filter(
+                    SeriesEpisode.series_id == series_id
+                ).delete()
+
+                # Stream episodes straight into batched inserts, collecting the
+                # series info from the same pass over the response body
+                info_items = ijson.sendable_list()
+                self._bulk_insert(
+                    db,
+                    SeriesEpisode,
+                    self._stream_episode_rows(response, series_id, info_items),
+                )
+                info = info_items[0]
+
+                # Update series info
+                if info:
+                    db.execute(
+                        update(Series)
+                        .where(Series.series_id == series_id)
+                        .values(
+                            name=info["name"],
+                            cover=info["cover"],
+                            plot=info["plot"],
+                            cast=info["cast"],
+                            director=info["director"],
+                            genre=info["genre"],
+                            release_date=info["releaseDate"],
+                            last_modified=info["last_modified"],
+                            rating=info["rating"],
+                            rating_5based=info["rating_5based"],
+                            backdrop_path=info["backdrop_path"],
+                            youtube_trailer=info.get("youtube_trailer", ""),
+                            episode_run_time=info["episode_run_time"],
+                        )
+                        .execution_options(synchronize_session=False)
                     )
-                    db.add(new_episode)
-
-            # Update series info
-            series = db.query(Series).filter(Series.series_id == series_id).first()
-            if series:
-                series.name = data["info"]["name"]
-                series.cover = data["info"]["cover"]
-                series.plot = data["info"]["plot"]
-                series.cast = data["info"]["cast"]
-                series.director = data["info"]["director"]
-                series.genre = data["info"]["genre"]
-                series.release_date = data["info"]["releaseDate"]
-                series.last_modified = data["info"]["last_modified"]
-                series.rating = data["info"]["rating"]
-                series.rating_5based = data["info"]["rating_5based"]
-                series.backdrop_path = data["info"]["backdrop_path"]
-                series.youtube_trailer = data["info"].get("youtube_trailer", "")
-                series.episode_run_time = data["info"]["episode_run_time"]
-                db.add(series)
-
-            # Update or create RefreshData
-            if not refresh_data:
-                refresh_data = RefreshData(data_type=f"series_streams_{series_id}")
-            refresh_data.last_refresh = datetime.utcnow()
-            db.add(refresh_data)
 
-            db.commit()
+                # Record the refresh and commit
+                refresh = self._mark_refreshed(
+                    db, f"series_streams_{series_id}", response
+                )
 
         # Fetch series and episodes from database
-        series = db.query(Series).filter(Series.series_id == series_id).first()
-        episodes = (
-            db.query(SeriesEpisode).filter(SeriesEpisode.series_id == series_id).all()
-        )
+        series = db.execute(SERIES_BY_ID, {"series_id": series_id}).first()
+        episodes = db.execute(SERIES_EPISODES, {"series_id": series_id}).all()
         logger.info(f"Fetched {len(episodes)} episodes from DB")
 
         # Convert to dictionary
@@ -903,6 +1243,8 @@ class CachedApiClient:
                 "category_id": series.category_id,
             },
             "episodes": {},
+            # episode id -> episode dict, so playback lookups don't scan seasons
+            "episode_index": {},
         }
 
         for episode in episodes:
@@ -924,11 +1266,12 @@ class CachedApiClient:
             )
 
             series_info["episodes"][episode.season].append(episode_dict)
+            series_info["episode_index"][episode_dict["id"]] = episode_dict
 
         return (
             series_info,
-            refresh_data.last_refresh,
-            refresh_data.last_refresh + timedelta(hours=24),
+            refresh.last_refresh,
+            refresh.expires_at,
         )
 
     def get_all_series(
@@ -937,129 +1280,81 @@ class CachedApiClient:
         force_refresh: bool = False,
         db: Session = None,
     ) -> Tuple[List[Dict[str, Any]], datetime, datetime]:
-        refresh_data = (
-            db.query(RefreshData).filter(RefreshData.data_type == "all_series").first()
+        return self._memoized(
+            "all_series",
+            connection_info,
+            force_refresh,
+            db,
+            lambda: self._get_all_series_from_db(connection_info, force_refresh, db),
         )
 
-        if (
-            force_refresh
-            or not refresh_data
-            or datetime.utcnow() - refresh_data.last_refresh > timedelta(hours=24)
-        ):
-            url = f"{connection_info.base_url}/player_api.php?username={connection_info.username}&password={connection_info.password}&action=get_series"
-            try:
-                response = requests.get(url)
-                response.raise_for_status()
-                data = response.json()
-
-                logger.info(f"Fetched {len(data)} series from API")
-
-                try:
-                    # Fetch and store categories first
-                    self.fetch_and_store_series_categories(connection_info, db)
+    def _get_all_series_from_db(
+        self,
+        connection_info: ConnectionInfo,
+        force_refresh: bool = False,
+        db: Session = None,
+    ) -> Tuple[List[Dict[str, Any]], datetime, datetime]:
+        refresh = self._get_refresh(db, "all_series")
 
-                    # Clear existing series
-                    deleted_count = db.query(Series).delete()
-                    logger.info(
-                        f"Cleared {deleted_count} existing series from database"
-                    )
+        if force_refresh or self._is_stale(refresh):
+            url = _api_url(connection_info, "get_series")
+            try:
+                # Request the categories alongside the series listing so the
+                # two round-trips overlap, then store them while the series
+                # body streams in
+                categories = self._refresh_pool.submit(
+                    self._session.get,
+                    _api_url(connection_info, "get_series_categories"),
+                    timeout=API_TIMEOUT,
+                )
+                response = self._fetch(url, refresh, force_refresh, stream=True)
+                self.fetch_and_store_series_categories(connection_info, db, categories)
+                self._mark_refreshed(db, "series_categories")
+                if response is None:
+                    # Upstream unchanged since the last refresh, keep the stored rows
+                    refresh = self._mark_refreshed(db, "all_series")
+                else:
+                    try:
+                        # Upsert all series as they stream in from the API, then
+                        # drop any the API no longer lists
+                        series_ids = self._bulk_upsert(
+                            db,
+                            Series,
+                            map(self._series_row, self._stream_items(response)),
+                            "series_id",
+                        )
+                        self._purge_missing(db, Series, "series_id", series_ids)
+                        new_series_count = len(series_ids)
 
-                    # Add new series in batches
-                    new_series_count = 0
-                    batch_size = 500
-                    for i in range(0, len(data), batch_size):
-                        batch = data[i : i + batch_size]
-                        series_objects = []
-                        for series in batch:
-                            new_series = Series(
-                                series_id=series["series_id"],
-                                category_id=series["category_id"],
-                                name=series["name"],
-                                cover=series["cover"],
-                                plot=series.get("plot", ""),
-                                cast=series.get("cast", ""),
-                                director=series.get("director", ""),
-                                genre=series.get("genre", ""),
-                                release_date=series.get("releaseDate", ""),
-                                last_modified=series.get("last_modified", ""),
-                                rating=series.get("rating", ""),
-                                rating_5based=series.get("rating_5based", 0.0),
-                                backdrop_path=series.get("backdrop_path", []),
-                                youtube_trailer=series.get("youtube_trailer", ""),
-                                episode_run_time=series.get("episode_run_time", ""),
-                            )
-                            series_objects.append(new_series)
-
-                        db.bulk_save_objects(series_objects)
-                        db.flush()
-                        new_series_count += len(series_objects)
                         logger.info(
-                            f"Added batch of {len(series_objects)} series. Total: {new_series_count}"
+                            f"Finished adding {new_series_count} new series to database"
                         )
 
-                    logger.info(
-                        f"Finished adding {new_series_count} new series to database"
-                    )
-
-                    # Update or create RefreshData
-                    if not refresh_data:
-                        refresh_data = RefreshData(data_type="all_series")
-                    refresh_data.last_refresh = datetime.utcnow()
-                    db.add(refresh_data)
+                        # Record the refresh and commit
+                        refresh = self._mark_refreshed(db, "all_series", response)
+                        self._optimize(db)
+                        logger.info("Successfully committed all changes to database")
 
-                    db.commit()
-                    logger.info("Successfully committed all changes to database")
-
-                    # Verify the number of series in the database
-                    actual_count = db.query(Series).count()
-                    logger.info(
-                        f"Actual number of series in database after refresh: {actual_count}"
-                    )
-
-                    if actual_count != new_series_count:
-                        logger.warning(
-                            f"Discrepancy in series count. Expected: {new_series_count}, Actual: {actual_count}"
-                        )
-
-                except SQLAlchemyError as e:
-                    logger.error(f"Error updating database: {str(e)}")
-                    db.rollback()
-                    raise
+                    except SQLAlchemyError as e:
+                        logger.error(f"Error updating database: {str(e)}")
+                        db.rollback()
+                        raise
 
             except requests.RequestException as e:
                 logger.error(f"Error fetching data from API: {str(e)}")
                 raise
 
-        # Fetch all series from database
-        all_series = db.query(Series).all()
-        logger.info(f"Retrieved {len(all_series)} series from database")
-
-        # Convert Series objects to dictionary
+        # Fetch all series from database as column tuples
         series_list = [
-            {
-                "series_id": series.series_id,
-                "category_id": series.category_id,
-                "name": series.name,
-                "cover": series.cover,
-                "plot": series.plot,
-                "cast": series.cast,
-                "director": series.director,
-                "genre": series.genre,
-                "releaseDate": series.release_date,
-                "last_modified": series.last_modified,
-                "rating": series.rating,
-                "rating_5based": series.rating_5based,
-                "backdrop_path": series.backdrop_path,
-                "youtube_trailer": series.youtube_trailer,
-                "episode_run_time": series.episode_run_time,
-            }
-            for series in all_series
+            dict(zip(ALL_SERIES_KEYS, row))
+            for row in db.execute(select(*SERIES_COLUMNS))
         ]
+        logger.info(f"Retrieved {len(series_list)} series from database")
 
         return (
             series_list,
-            refresh_data.last_refresh,
-            refresh_data.last_refresh + timedelta(hours=24),
+            refresh.last_refresh,
+            refresh.expires_at,
         )
 
     def get_film_categories(
@@ -1068,79 +1363,64 @@ class CachedApiClient:
         force_refresh: bool = False,
         db: Session = None,
     ) -> Tuple[List[Dict[str, Any]], datetime, datetime]:
-        refresh_data = (
-            db.query(RefreshData)
-            .filter(RefreshData.data_type == "film_categories")
-            .first()
+        return self._memoized(
+            "film_categories",
+            connection_info,
+            force_refresh,
+            db,
+            lambda: self._get_film_categories_from_db(
+                connection_info, force_refresh, db
+            ),
         )
 
-        if (
-            force_refresh
-            or not refresh_data
-            or datetime.utcnow() - refresh_data.last_refresh > timedelta(hours=24)
-        ):
-            categories = self.fetch_and_store_film_categories(connection_info, db)
-            fetch_time = datetime.utcnow()
+    def _get_film_categories_from_db(
+        self,
+        connection_info: ConnectionInfo,
+        force_refresh: bool = False,
+        db: Session = None,
+    ) -> Tuple[List[Dict[str, Any]], datetime, datetime]:
+        refresh = self._get_refresh(db, "film_categories")
 
-            if not refresh_data:
-                refresh_data = RefreshData(data_type="film_categories")
-            refresh_data.last_refresh = fetch_time
-            db.add(refresh_data)
-            db.commit()
+        if force_refresh or self._is_stale(refresh):
+            categories = self.fetch_and_store_film_categories(connection_info, db)
+            refresh = self._mark_refreshed(db, "film_categories")
         else:
-            categories = db.query(FilmCategory).all()
-            fetch_time = refresh_data.last_refresh
-
-        expiry_time = fetch_time + timedelta(hours=24)
-
-        # Convert FilmCategory objects or dictionaries to the expected format
-        film_categories_list = []
-        for category in categories:
-            if isinstance(category, dict):
-                film_categories_list.append(
-                    {
-                        "category_id": category.get("category_id"),
-                        "category_name": category.get("category_name"),
-                        "parent_id": category.get("parent_id", 0),
-                    }
-                )
-            else:  # FilmCategory object
-                film_categories_list.append(
-                    {
-                        "category_id": category.category_id,
-                        "category_name": category.category_name,
-                        "parent_id": category.parent_id,
-                    }
-                )
+            categories = [
+                dict(zip(FILM_CATEGORY_KEYS, row))
+                for row in db.execute(select(*FILM_CATEGORY_COLUMNS))
+            ]
 
-        return film_categories_list, fetch_time, expiry_time
+        return categories, refresh.last_refresh, refresh.expires_at
 
     def fetch_and_store_film_categories(
         self,
         connection_info: ConnectionInfo,
         db: Session,
-    ) -> List[FilmCategory]:
-        url = f"{connection_info.base_url}/player_api.php?username={connection_info.username}&password={connection_info.password}&action=get_vod_categories"
+    ) -> List[Dict[str, Any]]:
+        url = _api_url(connection_info, "get_vod_categories")
         try:
-            response = requests.get(url)
+            response = self._session.get(url, timeout=API_TIMEOUT)
             response.raise_for_status()
-            categories_data = response.json()
+            categories_data = orjson.loads(response.content)
 
             logger.info(f"Fetched {len(categories_data)} film categories from API")
 
-            # Clear existing categories
-            db.query(FilmCategory).delete()
-
-            # Add new categories
-            categories = []
-            for category_data in categories_data:
-                new_category = FilmCategory(
-                    category_id=category_data["category_id"],
-                    category_name=category_data["category_name"],
-                    parent_id=category_data.get("parent_id", 0),
-                )
-                db.add(new_category)
-                categories.append(new_category)
+            # Upsert categories, then drop any the API no longer lists
+            categories = [
+                {
+                    "category_id": category_data["category_id"],
+                    "category_name": category_data["category_name"],
+                    "parent_id": category_data.get("parent_id", 0),
+                }
+                for category_data in categories_data
+            ]
+            self._bulk_upsert(db, FilmCategory, categories, "category_id")
+            self._purge_missing(
+                db,
+                FilmCategory,
+                "category_id",
+                {c["category_id"] for c in categories},
+            )
 
             db.commit()
             logger.info(f"Stored {len(categories)} film categories in the database")
@@ -1155,42 +1435,6 @@ class CachedApiClient:
             db.rollback()
             raise
 
-    def _get_film_categories_from_db(
-        self, connection_info: ConnectionInfo, db: Session
-    ) -> Tuple[List[Dict[str, Any]], datetime, datetime]:
-        refresh_data = (
-            db.query(RefreshData)
-            .filter(RefreshData.data_type == "film_categories")
-            .first()
-        )
-
-        if not refresh_data:
-            # If no refresh data, create it with a past date to force a refresh
-            refresh_data = RefreshData(
-                data_type="film_categories", last_refresh=datetime.min
-            )
-            db.add(refresh_data)
-            db.commit()
-
-        # Fetch film categories from database
-        film_categories = db.query(FilmCategory).all()
-        logger.info(f"Fetched {len(film_categories)} film_categories from API")
-        # Convert FilmCategory objects to dictionary
-        film_categories_list = [
-            {
-                "category_id": category.category_id,
-                "category_name": category.category_name,
-                "parent_id": category.parent_id,
-            }
-            for category in film_categories
-        ]
-
-        return (
-            film_categories_list,
-            refresh_data.last_refresh,
-            refresh_data.last_refresh + timedelta(hours=24),
-        )
-
     def get_film_streams_by_category(
         self,
         connection_info: ConnectionInfo,
@@ -1198,6 +1442,12 @@ class CachedApiClient:
         force_refresh: bool = False,
         db: Session = None,
     ) -> List[Dict[str, Any]]:
+        data_type = f"film_streams_{category_id}"
+        if force_refresh or self._is_stale(self._get_refresh(db, data_type)):
+            with self._flight_lock(data_type):
+                return self._get_film_streams_from_db(
+                    connection_info, category_id, force_refresh, db
+                )
         return self._get_film_streams_from_db(
             connection_info, category_id, force_refresh, db
         )
@@ -1209,84 +1459,57 @@ class CachedApiClient:
         force_refresh: bool,
         db: Session,
     ) -> List[Dict[str, Any]]:
-        refresh_data = (
-            db.query(RefreshData)
-            .filter(RefreshData.data_type == f"film_streams_{category_id}")
-            .first()
-        )
+        refresh = self._get_refresh(db, f"film_streams_{category_id}")
 
-        if (
-            force_refresh
-            or not refresh_data
-            or datetime.utcnow() - refresh_data.last_refresh > timedelta(hours=24)
-        ):
+        if force_refresh or self._is_stale(refresh):
             # Fetch data from API
-            url = f"{connection_info.base_url}/player_api.php?username={connection_info.username}&password={connection_info.password}&action=get_vod_streams&category_id={category_id}"
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-
-            # Clear existing film streams for this category
-            db.query(FilmStream).filter(
-                FilmStream.category_id == str(category_id)
-            ).delete()
-
-            # Add new film streams
-            for stream in data:
-                new_stream = FilmStream(
-                    num=stream["num"],
-                    name=stream["name"],
-                    stream_type=stream["stream_type"],
-                    stream_id=stream["stream_id"],
-                    stream_icon=stream["stream_icon"],
-                    rating=stream["rating"],
-                    rating_5based=stream["rating_5based"],
-                    added=stream["added"],
-                    category_id=str(category_id),
-                    container_extension=stream["container_extension"],
-                    custom_sid=stream.get("custom_sid", ""),
-                    direct_source=stream.get("direct_source", ""),
+            url = _api_url(connection_info, "get_vod_streams", category_id=category_id)
+            response = self._fetch(url, refresh, force_refresh, stream=True)
+            if response is None:
+                # Upstream unchanged since the last refresh, keep the stored rows
+                refresh = self._mark_refreshed(db, f"film_streams_{category_id}")
+            else:
+                # Upsert film streams, then drop any gone from this category
+                stream_ids = self._bulk_upsert(
+                    db,
+                    FilmStream,
+                    (
+                        self._film_stream_row(stream, str(category_id))
+                        for stream in self._stream_items(response)
+                    ),
+                    "stream_id",
+                )
+                self._purge_missing(
+                    db,
+                    FilmStream,
+                    "stream_id",
+                    stream_ids,
+                    FilmStream.category_id == str(category_id),
                 )
-                db.add(new_stream)
 
-            # Update or create RefreshData
-            if not refresh_data:
-                refresh_data = RefreshData(data_type=f"film_streams_{category_id}")
-            refresh_data.last_refresh = datetime.utcnow()
-            db.add(refresh_data)
+                # Record the refresh and commit
+                refresh = self._mark_refreshed(
+                    db, f"film_streams_{category_id}", response
+                )
 
-            db.commit()
+        # Stream film streams from the database in batches
+        result = db.execute(FILM_STREAMS_BY_CATEGORY, {"category_id": str(category_id)})
 
-        # Fetch film streams from database
-        film_streams = (
-            db.query(FilmStream)
-            .filter(FilmStream.category_id == str(category_id))
-            .all()
-        )
-
-        # Convert FilmStream objects to dictionary and add computed fields
+        # Add computed fields to each row, hoisting loop invariants
+        play_prefix = f"{connection_info.base_url}/movie/{connection_info.username}/{connection_info.password}/"
         film_streams_list = []
-        for stream in film_streams:
-            stream_dict = {
-                "num": stream.num,
-                "name": stream.name,
-                "stream_type": stream.stream_type,
-                "stream_id": stream.stream_id,
-                "stream_icon": stream.stream_icon,
-                "rating": stream.rating,
-                "rating_5based": stream.rating_5based,
-                "added": stream.added,
-                "category_id": stream.category_id,
-                "container_extension": stream.container_extension,
-                "custom_sid": stream.custom_sid,
-                "direct_source": stream.direct_source,
-                "added_date": datetime.fromtimestamp(int(stream.added)).strftime(
-                    "%Y-%m-%d %H:%M:%S"
-                ),
-                "play_link": f"{connection_info.base_url}/movie/{connection_info.username}/{connection_info.password}/{stream.stream_id}.{stream.container_extension}",
-                "cached_icon": cache_icon(stream.stream_icon),
-            }
-            film_streams_list.append(stream_dict)
+        for rows in result.partitions():
+            cached_icons = cache_icons([row.stream_icon for row in rows])
+            for row, cached_icon in zip(rows, cached_icons):
+                stream = dict(zip(FILM_STREAM_KEYS, row))
+                if row.added_date is None:
+                    # Stored before added_date existed; filled on next refresh
+                    stream["added_date"] = _format_added(row.added)
+                stream["play_link"] = (
+                    f"{play_prefix}{row.stream_id}.{row.container_extension}"
+                )
+                stream["cached_icon"] = cached_icon
+                film_streams_list.append(stream)
 
         return film_streams_list
 
@@ -1296,106 +1519,69 @@ class CachedApiClient:
         force_refresh: bool = False,
         db: Session = None,
     ) -> Tuple[List[Dict[str, Any]], datetime, datetime]:
-        refresh_data = (
-            db.query(RefreshData).filter(RefreshData.data_type == "all_films").first()
+        return self._memoized(
+            "all_films",
+            connection_info,
+            force_refresh,
+            db,
+            lambda: self._get_all_films_from_db(connection_info, force_refresh, db),
         )
 
-        if (
-            force_refresh
-            or not refresh_data
-            or datetime.utcnow() - refresh_data.last_refresh > timedelta(hours=24)
-        ):
-            url = f"{connection_info.base_url}/player_api.php?username={connection_info.username}&password={connection_info.password}&action=get_vod_streams"
-            try:
-                response = requests.get(url)
-                response.raise_for_status()
-                data = response.json()
+    def _get_all_films_from_db(
+        self,
+        connection_info: ConnectionInfo,
+        force_refresh: bool = False,
+        db: Session = None,
+    ) -> Tuple[List[Dict[str, Any]], datetime, datetime]:
+        refresh = self._get_refresh(db, "all_films")
 
-                logger.info(f"Fetched {len(data)} films from API")
+        if force_refresh or self._is_stale(refresh):
+            url = _api_url(connection_info, "get_vod_streams")
+            try:
+                response = self._fetch(url, refresh, force_refresh, stream=True)
+                if response is None:
+                    # Upstream unchanged since the last refresh, keep the stored rows
+                    refresh = self._mark_refreshed(db, "all_films")
+                else:
+                    try:
+                        # Upsert all films as they stream in from the API, then
+                        # drop any the API no longer lists
+                        stream_ids = self._bulk_upsert(
+                            db,
+                            FilmStream,
+                            map(self._film_stream_row, self._stream_items(response)),
+                            "stream_id",
+                        )
+                        self._purge_missing(db, FilmStream, "stream_id", stream_ids)
 
-                try:
-                    # Clear existing films
-                    deleted_count = db.query(FilmStream).delete()
-                    logger.info(f"Cleared {deleted_count} existing films from database")
-
-                    # Add new films in batches
-                    new_film_count = 0
-                    batch_size = 500
-                    for i in range(0, len(data), batch_size):
-                        batch = data[i : i + batch_size]
-                        film_objects = []
-                        for film in batch:
-                            new_film = FilmStream(
-                                num=film["num"],
-                                name=film["name"],
-                                stream_type=film["stream_type"],
-                                stream_id=film["stream_id"],
-                                stream_icon=film["stream_icon"],
-                                rating=film["rating"],
-                                rating_5based=film["rating_5based"],
-                                added=film["added"],
-                                category_id=film["category_id"],
-                                container_extension=film["container_extension"],
-                                custom_sid=film.get("custom_sid", ""),
-                                direct_source=film.get("direct_source", ""),
-                            )
-                            film_objects.append(new_film)
-
-                        db.bulk_save_objects(film_objects)
-                        db.flush()
-                        new_film_count += len(film_objects)
                         logger.info(
-                            f"Added batch of {len(film_objects)} films. Total: {new_film_count}"
+                            f"Finished adding {len(stream_ids)} new films to database"
                         )
 
-                    logger.info(
-                        f"Finished adding {new_film_count} new films to database"
-                    )
-
-                    # Update or create RefreshData
-                    if not refresh_data:
-                        refresh_data = RefreshData(data_type="all_films")
-                    refresh_data.last_refresh = datetime.utcnow()
-                    db.add(refresh_data)
-
-                    db.commit()
-                    logger.info("Successfully committed all changes to database")
+                        # Record the refresh and commit
+                        refresh = self._mark_refreshed(db, "all_films", response)
+                        self._optimize(db)
+                        logger.info("Successfully committed all changes to database")
 
-                except SQLAlchemyError as e:
-                    logger.error(f"Error updating database: {str(e)}")
-                    raise
+                    except SQLAlchemyError as e:
+                        logger.error(f"Error updating database: {str(e)}")
+                        raise
 
             except requests.RequestException as e:
                 logger.error(f"Error fetching data from API: {str(e)}")
                 raise
 
-        # Fetch all films from database
-        all_films = db.query(FilmStream).all()
-        logger.info(f"Retrieved {len(all_films)} films from database")
-
-        # Convert FilmStream objects to dictionary
+        # Fetch all films from database as column tuples
         film_list = [
-            {
-                "num": film.num,
-                "name": film.name,
-                "stream_type": film.stream_type,
-                "stream_id": film.stream_id,
-                "stream_icon": film.stream_icon,
-                "rating": film.rating,
-                "rating_5based": film.rating_5based,
-                "added": film.added,
-                "category_id": film.category_id,
-                "container_extension": film.container_extension,
-                "custom_sid": film.custom_sid,
-                "direct_source": film.direct_source,
-            }
-            for film in all_films
+            dict(zip(FILM_STREAM_KEYS, row))
+            for row in db.execute(select(*FILM_STREAM_COLUMNS))
         ]
+        logger.info(f"Retrieved {len(film_list)} films from database")
 
         return (
             film_list,
-            refresh_data.last_refresh,
-            refresh_data.last_refresh + timedelta(hours=24),
+            refresh.last_refresh,
+            refresh.expires_at,
         )
 
     def get_film_details(
@@ -1408,8 +1594,16 @@ class CachedApiClient:
         if db is None:
             logger.error("Database session is None in get_film_details")
             raise HTTPException(status_code=500, detail="Database session error")
-        return self._get_film_details_from_db(
-            connection_info, vod_id, force_refresh, db
+        return self._memoized(
+            f"film_details_{vod_id}",
+            connection_info,
+            force_refresh,
+            db,
+            lambda: self._prepare_details(
+                self._get_film_details_from_db(
+                    connection_info, vod_id, force_refresh, db
+                )
+            ),
         )
 
     def _get_film_details_from_db(
@@ -1419,77 +1613,64 @@ class CachedApiClient:
         force_refresh: bool,
         db: Session,
     ) -> Tuple[Dict[str, Any], datetime, datetime]:
-        refresh_data = (
-            db.query(RefreshData)
-            .filter(RefreshData.data_type == f"film_details_{vod_id}")
-            .first()
-        )
+        refresh = self._get_refresh(db, f"film_details_{vod_id}")
         film_detail = (
             db.query(FilmDetail).filter(FilmDetail.stream_id == vod_id).first()
         )
 
-        if (
-            force_refresh
-            or not refresh_data
-            or not film_detail
-            or datetime.utcnow() - refresh_data.last_refresh > timedelta(hours=24)
-        ):
+        if force_refresh or not film_detail or self._is_stale(refresh):
             # Fetch data from API
-            url = f"{connection_info.base_url}/player_api.php?username={connection_info.username}&password={connection_info.password}&action=get_vod_info&vod_id={vod_id}"
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-
-            # Update or create FilmDetail
-            if not film_detail:
-                film_detail = FilmDetail(stream_id=vod_id)
-
-            # Update all fields
-            film_detail.name = data["info"].get("name", "")
-            film_detail.o_name = data["info"].get("o_name", "")
-            film_detail.stream_icon = data["info"].get("movie_image", "")
-            film_detail.cover_big = data["info"].get("cover_big", "")
-            film_detail.movie_image = data["info"].get("movie_image", "")
-            film_detail.plot = data["info"].get("plot", "")
-            film_detail.cast = data["info"].get("cast", "")
-            film_detail.director = data["info"].get("director", "")
-            film_detail.genre = data["info"].get("genre", "")
-            film_detail.release_date = data["info"].get("releasedate", "")
-            film_detail.rating = data["info"].get("rating", "")
-            film_detail.rating_5based = data["info"].get("rating_5based", 0.0)
-            film_detail.duration_secs = data["info"].get("duration_secs", 0)
-            film_detail.duration = data["info"].get("duration", "")
-            film_detail.youtube_trailer = data["info"].get("youtube_trailer", "")
-            film_detail.tmdb_id = data["info"].get("tmdb_id", "")
-            film_detail.kinopoisk_url = data["info"].get("kinopoisk_url", "")
-            film_detail.episode_run_time = data["info"].get("episode_run_time", "")
-            film_detail.actors = data["info"].get("actors", "")
-            film_detail.description = data["info"].get("description", "")
-            film_detail.age = data["info"].get("age", "")
-            film_detail.mpaa_rating = data["info"].get("mpaa_rating", "")
-            film_detail.rating_count_kinopoisk = data["info"].get(
-                "rating_count_kinopoisk", 0
-            )
-            film_detail.country = data["info"].get("country", "")
-            film_detail.backdrop_path = data["info"].get("backdrop_path", [])
-            film_detail.bitrate = data["info"].get("bitrate", 0)
-            film_detail.video = data["info"].get("video", [])
-            film_detail.audio = data["info"].get("audio", [])
-            film_detail.container_extension = data["movie_data"].get(
-                "container_extension", ""
-            )
-
-            db.add(film_detail)
+            url = _api_url(connection_info, "get_vod_info", vod_id=vod_id)
+            response = self._fetch(url, refresh, force_refresh or not film_detail)
+            if response is None:
+                # Upstream unchanged since the last refresh, keep the stored rows
+                refresh = self._mark_refreshed(db, f"film_details_{vod_id}")
+            else:
+                data = orjson.loads(response.content)
+
+                # Update or create FilmDetail
+                if not film_detail:
+                    film_detail = FilmDetail(stream_id=vod_id)
+
+                # Update all fields
+                film_detail.name = data["info"].get("name", "")
+                film_detail.o_name = data["info"].get("o_name", "")
+                film_detail.stream_icon = data["info"].get("movie_image", "")
+                film_detail.cover_big = data["info"].get("cover_big", "")
+                film_detail.movie_image = data["info"].get("movie_image", "")
+                film_detail.plot = data["info"].get("plot", "")
+                film_detail.cast = data["info"].get("cast", "")
+                film_detail.director = data["info"].get("director", "")
+                film_detail.genre = data["info"].get("genre", "")
+                film_detail.release_date = data["info"].get("releasedate", "")
+                film_detail.rating = data["info"].get("rating", "")
+                film_detail.rating_5based = data["info"].get("rating_5based", 0.0)
+                film_detail.duration_secs = data["info"].get("duration_secs", 0)
+                film_detail.duration = data["info"].get("duration", "")
+                film_detail.youtube_trailer = data["info"].get("youtube_trailer", "")
+                film_detail.tmdb_id = data["info"].get("tmdb_id", "")
+                film_detail.kinopoisk_url = data["info"].get("kinopoisk_url", "")
+                film_detail.episode_run_time = data["info"].get("episode_run_time", "")
+                film_detail.actors = data["info"].get("actors", "")
+                film_detail.description = data["info"].get("description", "")
+                film_detail.age = data["info"].get("age", "")
+                film_detail.mpaa_rating = data["info"].get("mpaa_rating", "")
+                film_detail.rating_count_kinopoisk = data["info"].get(
+                    "rating_count_kinopoisk", 0
+                )
+                film_detail.country = data["info"].get("country", "")
+                film_detail.backdrop_path = data["info"].get("backdrop_path", [])
+                film_detail.bitrate = data["info"].get("bitrate", 0)
+                film_detail.video = data["info"].get("video", [])
+                film_detail.audio = data["info"].get("audio", [])
+                film_detail.container_extension = data["movie_data"].get(
+                    "container_extension", ""
+                )
 
-            # Update or create RefreshData
-            if not refresh_data:
-                refresh_data = RefreshData(data_type=f"film_details_{vod_id}")
-            refresh_data.last_refresh = datetime.utcnow()
-            db.add(refresh_data)
+                db.add(film_detail)
 
-            db.commit()
-            db.refresh(film_detail)
-            db.refresh(refresh_data)
+                # Record the refresh and commit
+                refresh = self._mark_refreshed(db, f"film_details_{vod_id}", response)
 
         # Convert FilmDetail object to dictionary
         film_info = {
@@ -1534,8 +1715,8 @@ class CachedApiClient:
 
         return (
             film_info,
-            refresh_data.last_refresh,
-            refresh_data.last_refresh + timedelta(hours=24),
+            refresh.last_refresh,
+            refresh.expires_at,
         )
 
     def get_epg_info(
@@ -1549,54 +1730,69 @@ class CachedApiClient:
         stream_id: int,
         db: Session,
     ) -> Tuple[Dict[str, Any], datetime, datetime]:
-        refresh_data = (
-            db.query(RefreshData)
-            .filter(RefreshData.data_type == f"epg_{stream_id}")
-            .first()
-        )
+        refresh = self._get_refresh(db, f"epg_{stream_id}")
 
-        if (
-            not refresh_data
-            or datetime.utcnow() - refresh_data.last_refresh > timedelta(hours=24)
-        ):
+        if self._is_stale(refresh):
             # Fetch data from API
-            url = f"{connection_info.base_url}/player_api.php?username={connection_info.username}&password={connection_info.password}&action=get_simple_data_table&stream_id={stream_id}"
-            response = requests.get(url)
-            response.raise_for_status()
-            data = response.json()
-
-            # Clear existing EPG listings for this stream
-            db.query(EpgListing).filter(EpgListing.stream_id == stream_id).delete()
-
-            # Add new EPG listings
-            for listing in data.get("epg_listings", []):
-                new_listing = EpgListing(
-                    epg_id=listing["epg_id"],
-                    title=listing["title"],
-                    lang=listing["lang"],
-                    start=datetime.strptime(listing["start"], "%Y-%m-%d %H:%M:%S"),
-                    end=datetime.strptime(listing["end"], "%Y-%m-%d %H:%M:%S"),
-                    description=listing["description"],
-                    channel_id=listing["channel_id"],
-                    start_timestamp=int(listing["start_timestamp"]),
-                    stop_timestamp=int(listing["stop_timestamp"]),
-                    now_playing=bool(listing["now_playing"]),
-                    has_archive=bool(listing["has_archive"]),
-                    stream_id=stream_id,
+            url = _api_url(
+                connection_info, "get_simple_data_table", stream_id=stream_id
+            )
+            response = self._fetch(url, refresh, False)
+            if response is None:
+                # Upstream unchanged since the last refresh, keep the stored rows
+                refresh = self._mark_refreshed(db, f"epg_{stream_id}")
+            else:
+                data = orjson.loads(response.content)
+
+                # Clear existing EPG listings for this stream
+                db.query(EpgListing).filter(EpgListing.stream_id == stream_id).delete()
+
+                # Add new EPG listings; fromisoformat parses the
+                # "%Y-%m-%d %H:%M:%S" strings far faster than strptime
+                fromisoformat = datetime.fromisoformat
+                self._bulk_insert(
+                    db,
+                    EpgListing,
+                    (
+                        {
+                            "epg_id": listing["epg_id"],
+                            "title": listing["title"],
+                            "lang": listing["lang"],
+                            "start": fromisoformat(listing["start"]),
+                            "end": fromisoformat(listing["end"]),
+                            "description": listing["description"],
+                            "channel_id": listing["channel_id"],
+                            "start_timestamp": int(listing["start_timestamp"]),
+                            "stop_timestamp": int(listing["stop_timestamp"]),
+                            "now_playing": bool(listing["now_playing"]),
+                            "has_archive": bool(listing["has_archive"]),
+                            "stream_id": stream_id,
+                        }
+                        for listing in data.get("epg_listings", [])
+                    ),
                 )
-                db.add(new_listing)
-
-            # Update or create RefreshData
-            if not refresh_data:
-                refresh_data = RefreshData(data_type=f"epg_{stream_id}")
-            refresh_data.last_refresh = datetime.utcnow()
-            db.add(refresh_data)
 
-            db.commit()
+                # Record the refresh and commit
+                refresh = self._mark_refreshed(db, f"epg_{stream_id}", response)
 
         # Fetch EPG listings from database
-        epg_listings = (
-            db.query(EpgListing).filter(EpgListing.stream_id == stream_id).all()
+        epg_listings = db.execute(
+            select(
+                EpgListing.id,
+                EpgListing.epg_id,
+                EpgListing.title,
+                EpgListing.lang,
+                EpgListing.start,
+                EpgListing.end,
+                EpgListing.description,
+                EpgListing.channel_id,
+                EpgListing.start_timestamp,
+                EpgListing.stop_timestamp,
+                EpgListing.now_playing,
+                EpgListing.has_archive,
+            )
+            .where(EpgListing.stream_id == stream_id)
+            .order_by(EpgListing.start_timestamp)
         )
 
         # Process EPG listings
@@ -1606,23 +1802,22 @@ class CachedApiClient:
 
         return (
             epg_info,
-            refresh_data.last_refresh,
-            refresh_data.last_refresh + timedelta(hours=24),
+            refresh.last_refresh,
+            refresh.expires_at,
         )
 
     def _process_epg_listings(self, listings):
-        processed_listings = []
-        for listing in listings:
-            processed_listing = {
+        # b64decode takes the ASCII str directly, so skip the .encode() copy
+        b64decode = base64.b64decode
+        return [
+            {
                 "id": str(listing.id),
                 "epg_id": listing.epg_id,
-                "title": base64.b64decode(listing.title.encode()).decode(
-                    "utf-8", errors="replace"
-                ),
+                "title": b64decode(listing.title).decode("utf-8", errors="replace"),
                 "lang": listing.lang,
-                "start": listing.start.strftime("%Y-%m-%d %H:%M:%S"),
-                "end": listing.end.strftime("%Y-%m-%d %H:%M:%S"),
-                "description": base64.b64decode(listing.description.encode()).decode(
+                "start": listing.start.isoformat(" ", "seconds"),
+                "end": listing.end.isoformat(" ", "seconds"),
+                "description": b64decode(listing.description).decode(
                     "utf-8", errors="replace"
                 ),
                 "channel_id": listing.channel_id,
@@ -1631,8 +1826,8 @@ class CachedApiClient:
                 "now_playing": listing.now_playing,
                 "has_archive": listing.has_archive,
             }
-            processed_listings.append(processed_listing)
-        return processed_listings
+            for listing in listings
+        ]
 
 
 client = CachedApiClient()
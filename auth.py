@@ -1,15 +1,47 @@
-from typing import Optional
+import hashlib
+import threading
+import time
+from typing import Dict, NamedTuple, Optional, Tuple
 from passlib.context import CryptContext
-from datetime import timedelta, datetime
+from datetime import timedelta
 from sqlalchemy.orm import Session
 from jose import jwt, JWTError
 from fastapi.security import OAuth2PasswordBearer
 from fastapi import HTTPException, Depends, status, Request
 from database import User, get_db
-from config import ALGORITHM, SECRET_KEY
+from utils import utcnow
+from config import ALGORITHM, ARGON2_MEMORY_COST, ARGON2_TIME_COST, SECRET_KEY
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="token", auto_error=False)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+DEFAULT_TOKEN_EXPIRES = timedelta(minutes=15)
+# New hashes use argon2, by default with OWASP's minimum parameters (19 MiB,
+# 2 passes, 1 lane); bcrypt hashes and argon2 hashes with other parameters
+# still verify and are rehashed on the user's next successful login
+pwd_context = CryptContext(
+    schemes=["argon2", "bcrypt"],
+    deprecated="auto",
+    argon2__memory_cost=ARGON2_MEMORY_COST,
+    argon2__time_cost=ARGON2_TIME_COST,
+    argon2__parallelism=1,
+)
+
+
+class CurrentUser(NamedTuple):
+    id: int
+    username: str
+    is_active: bool
+    is_admin: bool
+    streams_access: bool
+    series_access: bool
+    films_access: bool
+
+
+# Verified tokens map to (user snapshot, cache expiry) so repeat requests skip
+# both the JWT decode and the user SELECT; permission changes drop the entries
+TOKEN_CACHE_TTL = 60
+TOKEN_CACHE_MAX_SIZE = 10_000
+_token_cache: Dict[bytes, Tuple[CurrentUser, float]] = {}
+_token_cache_lock = threading.Lock()
 
 
 def verify_password(plain_password, hashed_password):
@@ -22,23 +54,26 @@ def get_password_hash(password):
 
 def authenticate_user(db: Session, username: str, password: str):
     user = db.query(User).filter(User.username == username).first()
-    if not user or not verify_password(password, user.hashed_password):
+    if not user:
         return False
+    verified, new_hash = pwd_context.verify_and_update(password, user.hashed_password)
+    if not verified:
+        return False
+    if new_hash:
+        user.hashed_password = new_hash
+        db.commit()
     return user
 
 
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
-    if expires_delta:
-        expire = datetime.utcnow() + expires_delta
-    else:
-        expire = datetime.utcnow() + timedelta(minutes=15)
+    expire = utcnow() + (expires_delta or DEFAULT_TOKEN_EXPIRES)
     to_encode.update({"exp": expire})
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
 
-async def get_current_user(
+def get_current_user(
     request: Request, token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
 ):
     credentials_exception = HTTPException(
@@ -56,6 +91,13 @@ async def get_current_user(
         except IndexError:
             return None
 
+    key = hashlib.sha256(token.encode()).digest()
+    now = time.time()
+    with _token_cache_lock:
+        cached = _token_cache.get(key)
+    if cached and cached[1] > now:
+        return cached[0]
+
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
@@ -66,7 +108,30 @@ async def get_current_user(
     user = db.query(User).filter(User.username == username).first()
     if user is None:
         return None
-    return user
+    current_user = CurrentUser(*(getattr(user, field) for field in CurrentUser._fields))
+    _cache_token(key, current_user, min(now + TOKEN_CACHE_TTL, payload["exp"]), now)
+    return current_user
+
+
+def _cache_token(key: bytes, user: CurrentUser, expires: float, now: float):
+    with _token_cache_lock:
+        if len(_token_cache) >= TOKEN_CACHE_MAX_SIZE:
+            for stale in [k for k, v in _token_cache.items() if v[1] <= now]:
+                del _token_cache[stale]
+            if len(_token_cache) >= TOKEN_CACHE_MAX_SIZE:
+                _token_cache.clear()
+        _token_cache[key] = (user, expires)
+
+
+def forget_token(token: str):
+    with _token_cache_lock:
+        _token_cache.pop(hashlib.sha256(token.encode()).digest(), None)
+
+
+def forget_user(user_id: int):
+    with _token_cache_lock:
+        for key in [k for k, v in _token_cache.items() if v[0].id == user_id]:
+            del _token_cache[key]
 
 
 def user_has_streams_access(current_user: User = Depends(get_current_user)):
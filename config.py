@@ -10,4 +10,14 @@ SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key")
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
 
-SQLALCHEMY_DATABASE_URL = "sqlite:///./xtream_loader.db"
+SQLALCHEMY_DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./xtream_loader.db")
+
+# Server processes for `python main.py`. The token, refresh and result caches
+# live in process memory and assume a single process, so keep this at 1
+# unless stale permissions across workers are acceptable
+WORKERS = int(os.getenv("WORKERS", 1))
+
+# argon2 cost for new password hashes; lower it on small hosts where logins
+# are CPU-bound, existing hashes are rehashed on the next login
+ARGON2_MEMORY_COST = int(os.getenv("ARGON2_MEMORY_COST", 19456))
+ARGON2_TIME_COST = int(os.getenv("ARGON2_TIME_COST", 2))
@@ -1,5 +1,5 @@
 import logging
-from datetime import datetime
+import orjson
 from sqlalchemy import (
     create_engine,
     Column,
@@ -9,19 +9,70 @@ from sqlalchemy import (
     DateTime,
     JSON,
     Float,
+    Index,
+    event,
+    inspect,
+    text,
 )
+from sqlalchemy.engine import make_url
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
 from sqlalchemy.exc import SQLAlchemyError
 from config import SQLALCHEMY_DATABASE_URL
+from utils import utcnow
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def _engine_kwargs(url: str) -> dict:
+    url = make_url(url)
+    # Rows per multi-row INSERT when SQLAlchemy batches an executemany, and
+    # check pooled connections are alive before handing them out
+    kwargs = {"insertmanyvalues_page_size": 1000, "pool_pre_ping": True}
+    # Room for every distinct hot statement in the compiled-SQL cache
+    kwargs["query_cache_size"] = 1200
+    # JSON columns round-trip through orjson rather than the stdlib json module
+    kwargs["json_serializer"] = lambda value: orjson.dumps(value).decode()
+    kwargs["json_deserializer"] = orjson.loads
+    if url.get_backend_name() == "sqlite":
+        kwargs["connect_args"] = {"check_same_thread": False}
+        if url.database and url.database != ":memory:":
+            # Keep file connections pooled across requests rather than reopened
+            kwargs.update(poolclass=QueuePool, pool_size=5, max_overflow=10)
+    elif url.get_driver_name() == "psycopg2":
+        # Batch executemany into multi-row VALUES statements on psycopg2
+        kwargs["executemany_mode"] = "values_plus_batch"
+        kwargs["executemany_batch_page_size"] = 500
+    return kwargs
+
+
 engine = create_engine(
-    SQLALCHEMY_DATABASE_URL, connect_args={"check_same_thread": False}
+    SQLALCHEMY_DATABASE_URL, **_engine_kwargs(SQLALCHEMY_DATABASE_URL)
+)
+
+if engine.dialect.name == "sqlite":
+
+    @event.listens_for(engine, "connect")
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        # WAL lets readers proceed during refresh writes, and NORMAL sync
+        # avoids an fsync on every commit; the rest keep temp b-trees in RAM
+        # and give reads a 256MB mmap and a 64MB page cache
+        cursor = dbapi_connection.cursor()
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=268435456")
+        cursor.execute("PRAGMA cache_size=-65536")
+        # Wait for a concurrent writer's lock instead of failing immediately
+        cursor.execute("PRAGMA busy_timeout=5000")
+        cursor.close()
+
+
+# Keep committed attributes loaded so reading them back doesn't re-SELECT
+SessionLocal = sessionmaker(
+    autocommit=False, autoflush=False, expire_on_commit=False, bind=engine
 )
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
@@ -44,7 +95,9 @@ class RefreshData(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     data_type = Column(String, unique=True, index=True)
-    last_refresh = Column(DateTime, default=datetime.utcnow)
+    last_refresh = Column(DateTime, default=utcnow)
+    expires_at = Column(DateTime, index=True)
+    etag = Column(String)
 
 
 class UserInfo(Base):
@@ -94,12 +147,16 @@ class LiveChannel(Base):
     stream_icon = Column(String)
     epg_channel_id = Column(String)
     added = Column(String)
+    added_date = Column(String)
     category_id = Column(String, index=True)
     custom_sid = Column(String)
     tv_archive = Column(Integer)
     direct_source = Column(String)
     tv_archive_duration = Column(Integer)
 
+    # Category listings are filtered by category and ordered by channel number
+    __table_args__ = (Index("ix_live_channel_cat_num", "category_id", "num"),)
+
 
 class EpgListing(Base):
     __tablename__ = "epg_listings"
@@ -118,6 +175,12 @@ class EpgListing(Base):
     has_archive = Column(Boolean)
     stream_id = Column(Integer, index=True)
 
+    # Guide lookups filter by stream or channel and order by start time
+    __table_args__ = (
+        Index("ix_epg_stream_start", "stream_id", "start_timestamp"),
+        Index("ix_epg_channel_start", "channel_id", "start_timestamp"),
+    )
+
 
 class FilmCategory(Base):
     __tablename__ = "film_categories"
@@ -140,6 +203,7 @@ class FilmStream(Base):
     rating = Column(String)
     rating_5based = Column(Float)
     added = Column(String)
+    added_date = Column(String)
     category_id = Column(String, index=True)
     container_extension = Column(String)
     custom_sid = Column(String)
@@ -226,8 +290,41 @@ class SeriesEpisode(Base):
     rating = Column(Float)
     info = Column(JSON)
 
+    __table_args__ = (
+        Index("ix_series_ep_series_season_ep", "series_id", "season", "episode"),
+    )
+
+
+def add_missing_columns():
+    # create_all only creates missing tables, so add columns and indexes
+    # introduced since an existing database was created
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            added = [column for column in table.columns if column.name not in existing]
+            for column in added:
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(
+                    text(
+                        f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}"
+                    )
+                )
+                logger.info(f"Added column {table.name}.{column.name}")
+            for index in table.indexes:
+                index.create(conn, checkfirst=True)
+
+
+def analyze_if_needed():
+    # Gather planner statistics for tables that have never been analyzed
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.execute(text("PRAGMA optimize=0x10002"))
+
 
 Base.metadata.create_all(bind=engine)
+add_missing_columns()
+analyze_if_needed()
 
 
 def get_db():
@@ -1,38 +1,67 @@
 from datetime import timedelta
+import hashlib
 import os
 import logging
 import uvicorn
-from fastapi import FastAPI, HTTPException, Query, Request, Depends, status, Form
-from fastapi.responses import HTMLResponse, RedirectResponse
+from fastapi import (
+    FastAPI,
+    HTTPException,
+    Query,
+    Request,
+    Response,
+    Depends,
+    status,
+    Form,
+)
+from fastapi.responses import HTMLResponse, ORJSONResponse, RedirectResponse
+from fastapi.middleware.gzip import GZipMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.templating import Jinja2Templates
 from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import delete, select
 from sqlalchemy.orm import Session
-from utils import calculate_refresh_time
+from utils import calculate_refresh_time, clear_icon_cache
 from config import (
     API_BASE_URL,
     API_USERNAME,
     API_PASSWORD,
     ACCESS_TOKEN_EXPIRE_MINUTES,
+    WORKERS,
 )
 from auth import (
     authenticate_user,
     get_password_hash,
     create_access_token,
     get_current_user,
+    forget_token,
+    forget_user,
 )
 from api_client import ConnectionInfo, client
 from database import (
     User,
     get_db,
 )
+from templating import templates
 from routes import live_streams, series, films, epg, search, statistics
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
-templates = Jinja2Templates(directory="templates")
+ACCESS_TOKEN_EXPIRES = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+
+app = FastAPI(default_response_class=ORJSONResponse)
+
+# Compress rendered pages and JSON; small responses aren't worth the CPU
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
+
+@app.middleware("http")
+async def cache_static_icons(request: Request, call_next):
+    response = await call_next(request)
+    # Cached icons are named by the hash of their URL, so they never change
+    if request.url.path.startswith("/static/icons/") and response.status_code == 200:
+        response.headers["Cache-Control"] = "public, max-age=31536000, immutable"
+    return response
+
 
 # Serve static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
@@ -57,13 +86,15 @@ connection_info = ConnectionInfo(
 
 
 @app.get("/", response_class=HTMLResponse)
-async def read_root(
+def read_root(
     request: Request,
     current_user: User = Depends(get_current_user),
     force_refresh: bool = Query(False),
     error: str = Query(None),
     db: Session = Depends(get_db),
 ):
+    if not current_user:
+        return RedirectResponse(url="/login")
     if error is not None:
         if error == "authfail":
             error = "You need to be admin"
@@ -73,9 +104,19 @@ async def read_root(
         connection_info, force_refresh, db
     )
     refresh_time = calculate_refresh_time(expiry_time)
-    if not current_user:
-        return RedirectResponse(url="/login")
-    return templates.TemplateResponse(
+
+    # The page only changes with the stored user info, the countdown text, the
+    # error banner and the viewer's permissions, so revalidate on those
+    etag = (
+        '"%s"'
+        % hashlib.sha1(
+            f"{current_user}|{fetch_time.timestamp()}|{refresh_time}|{error}".encode()
+        ).hexdigest()
+    )
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED)
+
+    response = templates.TemplateResponse(
         "index.html",
         {
             "request": request,
@@ -87,11 +128,13 @@ async def read_root(
             "error": error,
         },
     )
+    response.headers["ETag"] = etag
+    return response
 
 
 # FIXME: support for mkv, avi etc
 @app.get("/stream/{type}/{id}")
-async def stream_video(
+def stream_video(
     type: str,
     id: str,
     request: Request,
@@ -114,15 +157,7 @@ async def stream_video(
             if not series_info:
                 raise HTTPException(status_code=404, detail="Series not found")
 
-            episode = next(
-                (
-                    ep
-                    for season in series_info["episodes"].values()
-                    for ep in season
-                    if ep["id"] == episode_id
-                ),
-                None,
-            )
+            episode = series_info["episode_index"].get(episode_id)
             if not episode:
                 raise HTTPException(status_code=404, detail="Episode not found")
 
@@ -171,7 +206,7 @@ async def empty_content():
 
 # Login and logout routes
 @app.post("/token")
-async def login(
+def login(
     request: Request,
     form_data: OAuth2PasswordRequestForm = Depends(),
     db: Session = Depends(get_db),
@@ -183,9 +218,8 @@ async def login(
             {"request": request, "error": "Incorrect username or password"},
             status_code=400,
         )
-    access_token_expires = timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
-        data={"sub": user.username}, expires_delta=access_token_expires
+        data={"sub": user.username}, expires_delta=ACCESS_TOKEN_EXPIRES
     )
     response = RedirectResponse(url="/", status_code=302)
     response.set_cookie(
@@ -196,6 +230,9 @@ async def login(
 
 @app.get("/logout")
 async def logout(request: Request):
+    token = request.cookies.get("access_token")
+    if token:
+        forget_token(token.split()[-1])
     response = RedirectResponse(url="/login")
     response.delete_cookie("access_token")
     return response
@@ -209,7 +246,7 @@ async def login_page(request: Request):
 
 # Admin routes
 @app.get("/admin", response_class=HTMLResponse)
-async def admin_page(
+def admin_page(
     request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
@@ -218,14 +255,24 @@ async def admin_page(
         return RedirectResponse(url="/login")
     if not current_user.is_admin:
         return RedirectResponse(url="/?error=authfail")
-    users = db.query(User).all()
+    # Only the columns the user table renders, as lightweight rows
+    users = db.execute(
+        select(
+            User.id,
+            User.username,
+            User.is_admin,
+            User.streams_access,
+            User.series_access,
+            User.films_access,
+        )
+    ).all()
     return templates.TemplateResponse(
         "admin.html", {"request": request, "users": users, "current_user": current_user}
     )
 
 
 @app.post("/admin/add_user")
-async def add_user(
+def add_user(
     request: Request,
     username: str = Form(...),
     password: str = Form(...),
@@ -241,9 +288,10 @@ async def add_user(
     if not current_user.is_admin:
         return RedirectResponse(url="/?error=authfail")
 
+    hashed_password = get_password_hash(password)
     db_user = User(
         username=username,
-        hashed_password=get_password_hash(password),
+        hashed_password=hashed_password,
         is_admin=is_admin,
         streams_access=streams_access,
         series_access=series_access,
@@ -255,7 +303,7 @@ async def add_user(
 
 
 @app.put("/admin/update_permission/{user_id}")
-async def update_permission(
+def update_permission(
     user_id: int,
     permission: str = Form(...),
     db: Session = Depends(get_db),
@@ -268,11 +316,22 @@ async def update_permission(
         raise HTTPException(status_code=404, detail="User not found")
     setattr(user, permission, not getattr(user, permission))
     db.commit()
+    forget_user(user_id)
     return {"success": True}
 
 
+@app.post("/admin/clear_icon_cache")
+def clear_icon_cache_route(current_user: User = Depends(get_current_user)):
+    if not current_user:
+        return RedirectResponse(url="/login")
+    if not current_user.is_admin:
+        return RedirectResponse(url="/?error=authfail")
+    clear_icon_cache()
+    return RedirectResponse(url="/admin", status_code=status.HTTP_303_SEE_OTHER)
+
+
 @app.post("/admin/delete_user/{user_id}")
-async def delete_user(
+def delete_user(
     user_id: int,
     db: Session = Depends(get_db),
     current_user: User = Depends(get_current_user),
@@ -281,12 +340,21 @@ async def delete_user(
         return RedirectResponse(url="/login")
     if not current_user.is_admin:
         return RedirectResponse(url="/?error=authfail")
-    user = db.query(User).filter(User.id == user_id).first()
-    if user:
-        db.delete(user)
+    if db.execute(delete(User).where(User.id == user_id)).rowcount:
         db.commit()
+        forget_user(user_id)
     return RedirectResponse(url="/admin", status_code=status.HTTP_303_SEE_OTHER)
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # An import string lets uvicorn spawn workers; "auto" picks uvloop and
+    # httptools when they're installed
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=WORKERS,
+        loop="auto",
+        http="auto",
+        log_level="info",
+    )
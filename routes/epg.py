@@ -1,9 +1,9 @@
 import os
 from fastapi import APIRouter, Depends, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from database import User, get_db
+from templating import templates
 from api_client import client, ConnectionInfo
 from utils import calculate_refresh_time, format_timestamp
 from auth import get_current_user
@@ -11,11 +11,10 @@ from datetime import datetime
 from config import API_BASE_URL, API_PASSWORD, API_USERNAME
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
 
 
 @router.get("/epg/{stream_id}")
-async def get_epg(
+def get_epg(
     stream_id: int,
     request: Request,
     current_user: User = Depends(get_current_user),
@@ -35,7 +34,7 @@ async def get_epg(
 
 
 @router.get("/epg_page/{stream_id}", response_class=HTMLResponse)
-async def get_epg_page(
+def get_epg_page(
     stream_id: int,
     request: Request,
     current_user: User = Depends(get_current_user),
@@ -3,25 +3,22 @@ import os
 import logging
 from fastapi import APIRouter, Depends, Query, Request, BackgroundTasks, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from database import User, get_db
+from templating import templates
 from api_client import client, ConnectionInfo
-from utils import calculate_refresh_time, cache_backdrop
+from utils import calculate_refresh_time
 from auth import user_has_films_access
-from urllib.parse import quote
 from config import API_BASE_URL, API_PASSWORD, API_USERNAME
 from utils import cache_icons_background
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
 
 
 @router.get("/films", response_class=HTMLResponse)
-async def film_page(
+def film_page(
     request: Request,
     current_user: User = Depends(user_has_films_access),
     force_refresh: bool = Query(False),
@@ -60,7 +57,7 @@ async def film_page(
 
 
 @router.get("/films/refresh-all", response_class=HTMLResponse)
-async def refresh_all_films(
+def refresh_all_films(
     request: Request,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(user_has_films_access),
@@ -119,7 +116,7 @@ async def refresh_all_films(
 
 
 @router.get("/film-category/{category_id}")
-async def get_film_category_streams(
+def get_film_category_streams(
     category_id: int,
     request: Request,
     current_user: User = Depends(user_has_films_access),
@@ -145,7 +142,7 @@ async def get_film_category_streams(
 
 
 @router.get("/film/{vod_id}", response_class=HTMLResponse)
-async def get_film_details(
+def get_film_details(
     vod_id: int,
     request: Request,
     current_user: User = Depends(user_has_films_access),
@@ -166,17 +163,6 @@ async def get_film_details(
     )
     refresh_time = calculate_refresh_time(expiry_time)
 
-    backdrop_path = film_info["info"].get("backdrop_path")
-    film_info["info"]["cached_backdrop"] = cache_backdrop(backdrop_path)
-
-    youtube_trailer = film_info["info"].get("youtube_trailer")
-    if youtube_trailer:
-        film_info["info"]["youtube_trailer"] = quote(youtube_trailer)
-
-    film_info["play_link"] = (
-        f"{connection_info.base_url}/movie/{connection_info.username}/{connection_info.password}/{film_info['movie_data']['stream_id']}.{film_info['movie_data']['container_extension']}"
-    )
-
     return templates.TemplateResponse(
         "film_details.html",
         {
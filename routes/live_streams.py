@@ -2,24 +2,22 @@ from datetime import datetime
 import logging
 from fastapi import APIRouter, Depends, Request, BackgroundTasks
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from database import User, get_db
+from templating import templates
 from api_client import client, ConnectionInfo
 from utils import calculate_refresh_time, cache_icons_background
 from auth import user_has_streams_access
 from config import API_BASE_URL, API_PASSWORD, API_USERNAME
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
 
 
 @router.get("/streams", response_class=HTMLResponse)
-async def streams_page(
+def streams_page(
     request: Request,
     current_user: User = Depends(user_has_streams_access),
     db: Session = Depends(get_db),
@@ -53,7 +51,7 @@ async def streams_page(
 
 
 @router.get("/streams/refresh-all", response_class=HTMLResponse)
-async def refresh_all_streams(
+def refresh_all_streams(
     request: Request,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(user_has_streams_access),
@@ -1,17 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from fastapi.responses import HTMLResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from sqlalchemy import or_
 from database import get_db, User, Series, FilmStream, LiveChannel
+from templating import templates
 from auth import get_current_user
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
 
 
 @router.get("/search", response_class=HTMLResponse)
-async def search(
+def search(
     request: Request,
     q: str = Query(..., min_length=1, max_length=100),
     search_type: str = Query(..., regex="^(series|films|tv)$"),
@@ -3,24 +3,21 @@ import os
 import logging
 from fastapi import APIRouter, Depends, Query, Request, BackgroundTasks, HTTPException
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from database import User, get_db
+from templating import templates
 from api_client import client, ConnectionInfo
-from utils import calculate_refresh_time, cache_backdrop, cache_icons_background
+from utils import calculate_refresh_time, cache_icons_background
 from auth import user_has_series_access
-from urllib.parse import quote
 from config import API_BASE_URL, API_PASSWORD, API_USERNAME
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
 
 
 @router.get("/series", response_class=HTMLResponse)
-async def series_page(
+def series_page(
     request: Request,
     current_user: User = Depends(user_has_series_access),
     force_refresh: bool = Query(False),
@@ -59,7 +56,7 @@ async def series_page(
 
 
 @router.get("/series/refresh-all", response_class=HTMLResponse)
-async def refresh_all_series(
+def refresh_all_series(
     request: Request,
     background_tasks: BackgroundTasks,
     current_user: User = Depends(user_has_series_access),
@@ -76,13 +73,11 @@ async def refresh_all_series(
         return RedirectResponse(url="/login")
 
     try:
-        # First, refresh categories
-        series_categories, _, _ = client.get_series_category(connection_info, db=db)
-
-        # Then, refresh all series
+        # Refresh all series, which also refreshes the categories
         all_series, fetch_time, _ = client.get_all_series(
             connection_info, force_refresh=True, db=db
         )
+        series_categories, _, _ = client.get_series_category(connection_info, db=db)
 
         background_tasks.add_task(cache_icons_background, all_series)
 
@@ -116,7 +111,7 @@ async def refresh_all_series(
 
 
 @router.get("/series/{series_id}", response_class=HTMLResponse)
-async def get_series_episodes(
+def get_series_episodes(
     series_id: int,
     request: Request,
     current_user: User = Depends(user_has_series_access),
@@ -137,17 +132,6 @@ async def get_series_episodes(
     )
     refresh_time = calculate_refresh_time(expiry_time)
 
-    backdrop_path = series_info["info"].get("backdrop_path")
-    series_info["info"]["cached_backdrop"] = cache_backdrop(backdrop_path)
-
-    youtube_trailer = series_info["info"].get("youtube_trailer")
-    if youtube_trailer:
-        if isinstance(youtube_trailer, list):
-            youtube_trailer = youtube_trailer[0] if youtube_trailer else None
-        series_info["info"]["youtube_trailer"] = (
-            quote(youtube_trailer) if youtube_trailer else None
-        )
-
     return templates.TemplateResponse(
         "series_details.html",
         {
@@ -162,7 +146,7 @@ async def get_series_episodes(
 
 
 @router.get("/series-category/{category_id}")
-async def get_series_category_shows(
+def get_series_category_shows(
     category_id: int,
     request: Request,
     current_user: User = Depends(user_has_series_access),
@@ -1,16 +1,15 @@
 from fastapi import APIRouter, Depends, Request
 from fastapi.responses import HTMLResponse, RedirectResponse
-from fastapi.templating import Jinja2Templates
 from sqlalchemy.orm import Session
 from database import get_db, FilmStream, Series, LiveChannel, User
+from templating import templates
 from auth import get_current_user
 
 router = APIRouter()
-templates = Jinja2Templates(directory="templates")
 
 
 @router.get("/statistics", response_class=HTMLResponse)
-async def statistics_page(
+def statistics_page(
     request: Request,
     current_user: User = Depends(get_current_user),
     db: Session = Depends(get_db),
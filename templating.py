@@ -0,0 +1,20 @@
+import os
+from fastapi.templating import Jinja2Templates
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader
+
+JINJA_CACHE_DIR = ".jinja_cache"
+os.makedirs(JINJA_CACHE_DIR, exist_ok=True)
+
+# One shared environment: templates are compiled once, the bytecode survives
+# restarts, and files aren't re-stat'ed for changes on every render. Escaping
+# stays on, as with Jinja2Templates(directory=...), since templates render
+# upstream names, plots and EPG text
+templates = Jinja2Templates(
+    env=Environment(
+        loader=FileSystemLoader("templates"),
+        autoescape=True,
+        auto_reload=False,
+        bytecode_cache=FileSystemBytecodeCache(JINJA_CACHE_DIR),
+        cache_size=400,
+    )
+)
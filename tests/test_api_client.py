@@ -0,0 +1,114 @@
+import io
+import os
+import sys
+import unittest
+from datetime import timedelta
+from unittest import mock
+
+import orjson
+import requests
+
+os.environ["DATABASE_URL"] = "sqlite://"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_client import CachedApiClient, ConnectionInfo  # noqa: E402
+from database import RefreshData, SessionLocal, Series, SeriesEpisode  # noqa: E402
+from utils import utcnow  # noqa: E402
+
+SERIES_ID = 1
+INFO = {
+    "name": "Series",
+    "cover": "",
+    "plot": "",
+    "cast": "",
+    "director": "",
+    "genre": "",
+    "releaseDate": "",
+    "last_modified": "",
+    "rating": "5",
+    "rating_5based": 2.5,
+    "backdrop_path": [],
+    "youtube_trailer": "",
+    "episode_run_time": "",
+}
+EPISODE = {"episode_num": 1, "title": "Episode", "container_extension": "mkv"}
+GOOD = orjson.dumps({"info": INFO, "episodes": {"1": [EPISODE]}})
+MALFORMED = [
+    b'{"user_info": {"auth": 0}}',
+    b"{}",
+    b"[]",
+    b"",
+    b'{"episodes": {"1": [',
+]
+
+
+def _response(body: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = 200
+    response.url = "http://upstream/player_api.php"
+    response.raw = io.BytesIO(body)
+    return response
+
+
+class SeriesEpisodeRefreshTest(unittest.TestCase):
+    def setUp(self):
+        self.db = SessionLocal()
+        self.db.query(SeriesEpisode).delete()
+        self.db.query(Series).delete()
+        self.db.query(RefreshData).delete()
+        self.db.add(Series(series_id=SERIES_ID, name="Series"))
+        self.db.commit()
+        self.client = CachedApiClient()
+        self.connection_info = ConnectionInfo("http://upstream", "user", "pass")
+
+    def tearDown(self):
+        self.db.close()
+
+    def _refresh(self, body: bytes, force_refresh: bool = True):
+        with mock.patch.object(self.client, "_fetch", return_value=_response(body)):
+            return self.client._get_series_streams_from_db(
+                self.connection_info, SERIES_ID, force_refresh, self.db
+            )
+
+    def _episode_count(self) -> int:
+        return self.db.query(SeriesEpisode).count()
+
+    def test_malformed_payload_keeps_existing_episodes(self):
+        self._refresh(GOOD)
+        refreshed = self.db.query(RefreshData).one().last_refresh
+        for body in MALFORMED:
+            with self.subTest(body=body):
+                with self.assertRaises(requests.exceptions.InvalidJSONError):
+                    self._refresh(body)
+                self.db.rollback()
+                self.assertEqual(self._episode_count(), 1)
+                self.assertEqual(
+                    self.db.query(RefreshData).one().last_refresh, refreshed
+                )
+
+    def test_stale_episodes_served_after_malformed_payload(self):
+        with mock.patch("api_client.cache_backdrop", return_value=None):
+            with mock.patch.object(self.client, "_fetch", return_value=_response(GOOD)):
+                self.client.get_series_streams_by_series(
+                    self.connection_info, SERIES_ID, True, self.db
+                )
+            # Expire the memoized copy and the refresh so the next read refetches
+            key = (f"series_streams_{SERIES_ID}", self.connection_info.base_url)
+            expired = utcnow() - timedelta(seconds=1)
+            self.client._memo[key] = (expired, self.client._memo[key][1])
+            self.db.query(RefreshData).update({"expires_at": expired})
+            self.db.commit()
+            self.client._refresh_cache.clear()
+
+            with mock.patch.object(
+                self.client, "_fetch", return_value=_response(b"{}")
+            ):
+                data, _, _ = self.client.get_series_streams_by_series(
+                    self.connection_info, SERIES_ID, False, self.db
+                )
+        self.assertEqual(len(data["episodes"][1]), 1)
+        self.assertEqual(self._episode_count(), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
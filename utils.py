@@ -1,20 +1,44 @@
 import hashlib
 import logging
 import os
+import shutil
 from random import randint
 import threading
 from time import sleep
 from typing import Any, List, Optional, Union, Dict
-from datetime import datetime
+from datetime import datetime, timezone
 import requests
+from requests.adapters import HTTPAdapter
 import asyncio
 from concurrent.futures import ThreadPoolExecutor
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 ICONS_DIR = "static/icons"
 
+# Shared pool for downloading icons in the background
+ICON_POOL_SIZE = 16
+ICON_POOL = ThreadPoolExecutor(max_workers=ICON_POOL_SIZE)
+
+# (connect, read) timeout for image downloads
+DOWNLOAD_TIMEOUT = (5, 30)
+
+# One pooled session for image downloads, so icons served from the same host
+# reuse kept-alive connections; sized so every download worker gets one
+_session = requests.Session()
+_adapter = HTTPAdapter(pool_connections=ICON_POOL_SIZE, pool_maxsize=ICON_POOL_SIZE)
+_session.mount("http://", _adapter)
+_session.mount("https://", _adapter)
+
+# icon_url -> cached static path, only populated once the file is on disk
+_icon_paths: Dict[str, str] = {}
+_icon_paths_lock = threading.Lock()
+# icon_urls queued on ICON_POOL but not yet downloaded
+_pending_icons = set()
+# Filenames known to be in ICONS_DIR, listed once so repeat lookups skip the
+# stat; None until first use or after the cache is cleared
+_icon_files: Optional[set] = None
+
 
 class DownloadCounter:
     def __init__(self, total):
@@ -33,11 +57,10 @@ class DownloadCounter:
 async def cache_icons_background(
     data_list: List[Dict[str, Any]], data_type: str = "series"
 ):
-    icon_urls = [
-        item.get("cover" if data_type == "series" else "stream_icon")
-        for item in data_list
-        if item.get("cover" if data_type == "series" else "stream_icon")
-    ]
+    # Many items share an icon; fetch each distinct URL once so concurrent
+    # workers never download the same file twice
+    key = "cover" if data_type == "series" else "stream_icon"
+    icon_urls = list(dict.fromkeys(item[key] for item in data_list if item.get(key)))
 
     total_icons = len(icon_urls)
     counter = DownloadCounter(total_icons)
@@ -55,18 +78,85 @@ async def cache_icons_background(
     logger.info(f"Finished downloading all {total_icons} icons")
 
 
+def clear_icon_cache() -> int:
+    # Delete the downloaded icons and backdrops, then forget their paths so
+    # they are fetched again the next time they are shown
+    global _icon_files
+    removed = 0
+    for entry in os.scandir(ICONS_DIR):
+        if entry.is_file():
+            try:
+                os.remove(entry.path)
+                removed += 1
+            except FileNotFoundError:
+                pass
+    with _icon_paths_lock:
+        _icon_paths.clear()
+        _icon_files = None
+    logger.info(f"Cleared {removed} cached icons")
+    return removed
+
+
+def _icon_file_exists(filename: str) -> bool:
+    global _icon_files
+    files = _icon_files
+    if files is None:
+        try:
+            files = set(os.listdir(ICONS_DIR))
+        except FileNotFoundError:
+            files = set()
+        with _icon_paths_lock:
+            _icon_files = files
+    if filename in files:
+        return True
+    # Another worker process may have downloaded it since the listing
+    if os.path.exists(os.path.join(ICONS_DIR, filename)):
+        files.add(filename)
+        return True
+    return False
+
+
+def _icon_file_added(filename: str):
+    files = _icon_files
+    if files is not None:
+        files.add(filename)
+
+
+def _download(url: str, filename: str):
+    # Stream the body to a temporary file in 64KB chunks rather than holding
+    # the whole image in memory, then rename it into place so a failed or
+    # concurrent download never leaves a truncated file behind
+    filepath = os.path.join(ICONS_DIR, filename)
+    partpath = f"{filepath}.{os.getpid()}.{threading.get_ident()}.part"
+    try:
+        with _session.get(url, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+            response.raise_for_status()
+            response.raw.decode_content = True
+            with open(partpath, "wb") as f:
+                shutil.copyfileobj(response.raw, f, length=64 * 1024)
+        os.replace(partpath, filepath)
+    except BaseException:
+        if os.path.exists(partpath):
+            os.remove(partpath)
+        raise
+    _icon_file_added(filename)
+
+
 def cache_icon(icon_url: str, counter: DownloadCounter = None) -> str:
+    # Skip hashing and the disk stat for icons we have already cached
+    cached_path = _icon_paths.get(icon_url)
+    if cached_path is not None:
+        if counter:
+            counter.increment()
+        return cached_path
+
     # Generate a unique filename based on the URL
     filename = hashlib.md5(icon_url.encode()).hexdigest() + ".png"
-    filepath = os.path.join(ICONS_DIR, filename)
 
     # If the file doesn't exist, download it
-    if not os.path.exists(filepath):
+    if not _icon_file_exists(filename):
         try:
-            response = requests.get(icon_url)
-            response.raise_for_status()
-            with open(filepath, "wb") as f:
-                f.write(response.content)
+            _download(icon_url, filename)
             sleep_time = randint(3, 5)
             logger.info(
                 f"Downloaded icon: {icon_url}, sleeping for {sleep_time} seconds"
@@ -82,7 +172,55 @@ def cache_icon(icon_url: str, counter: DownloadCounter = None) -> str:
     elif counter:
         counter.increment()
 
-    return f"/static/icons/{filename}"
+    cached_path = f"/static/icons/{filename}"
+    with _icon_paths_lock:
+        _icon_paths[icon_url] = cached_path
+    return cached_path
+
+
+def cached_icon_path(icon_url: str) -> Optional[str]:
+    cached_path = _icon_paths.get(icon_url)
+    if cached_path is not None:
+        return cached_path
+
+    filename = hashlib.md5(icon_url.encode()).hexdigest() + ".png"
+    if not _icon_file_exists(filename):
+        return None
+
+    cached_path = f"/static/icons/{filename}"
+    with _icon_paths_lock:
+        _icon_paths[icon_url] = cached_path
+    return cached_path
+
+
+def _warm_icon(icon_url: str):
+    try:
+        cache_icon(icon_url)
+    finally:
+        with _icon_paths_lock:
+            _pending_icons.discard(icon_url)
+
+
+def _resolve_icon(icon_url: str) -> Optional[str]:
+    if not icon_url:
+        return None
+    cached_path = cached_icon_path(icon_url)
+    if cached_path is None:
+        with _icon_paths_lock:
+            submit = icon_url not in _pending_icons
+            _pending_icons.add(icon_url)
+        if submit:
+            ICON_POOL.submit(_warm_icon, icon_url)
+        cached_path = icon_url
+    return cached_path
+
+
+def cache_icons(icon_urls: List[str]) -> List[Optional[str]]:
+    # Serve icons already on disk and download the rest in the background,
+    # falling back to the upstream URL so responses never wait on downloads.
+    # Many streams share an icon, so resolve each distinct URL once.
+    resolved = {icon_url: _resolve_icon(icon_url) for icon_url in set(icon_urls)}
+    return [resolved[icon_url] for icon_url in icon_urls]
 
 
 def cache_backdrop(backdrop_path: Union[str, List[str]]) -> Optional[str]:
@@ -99,15 +237,11 @@ def cache_backdrop(backdrop_path: Union[str, List[str]]) -> Optional[str]:
 
     # Generate a unique filename based on the URL
     filename = hashlib.md5(backdrop_url.encode()).hexdigest() + ".jpg"
-    filepath = os.path.join(ICONS_DIR, filename)
 
     # If the file doesn't exist, download it
-    if not os.path.exists(filepath):
+    if not _icon_file_exists(filename):
         try:
-            response = requests.get(backdrop_url)
-            response.raise_for_status()
-            with open(filepath, "wb") as f:
-                f.write(response.content)
+            _download(backdrop_url, filename)
             print(f"Downloaded backdrop: {backdrop_url}")
         except requests.RequestException as e:
             print(f"Error downloading backdrop {backdrop_url}: {e}")
@@ -116,17 +250,26 @@ def cache_backdrop(backdrop_path: Union[str, List[str]]) -> Optional[str]:
     return f"/static/icons/{filename}"
 
 
+def utcnow() -> datetime:
+    # Naive UTC, matching the DateTime columns; datetime.utcnow is deprecated
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
 def calculate_refresh_time(expiry_time: datetime) -> str:
-    time_until_refresh = expiry_time - datetime.now()
-    hours, remainder = divmod(time_until_refresh.seconds, 3600)
+    # Refresh expiries are stored in UTC, so compare against UTC rather than
+    # local time
+    time_until_refresh = expiry_time - utcnow()
+    # total_seconds so TTLs longer than a day aren't truncated to the day
+    hours, remainder = divmod(max(int(time_until_refresh.total_seconds()), 0), 3600)
     minutes, _ = divmod(remainder, 60)
     return f"{hours} hours and {minutes} minutes"
 
 
 def format_timestamp(timestamp):
+    # Called per EPG listing when rendering; isoformat is cheaper than strftime
     if isinstance(timestamp, datetime):
-        return timestamp.strftime("%Y-%m-%d %H:%M:%S")
+        return timestamp.isoformat(" ", "seconds")
     elif isinstance(timestamp, (int, float)):
-        return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M:%S")
+        return datetime.fromtimestamp(timestamp).isoformat(" ", "seconds")
     else:
         return str(timestamp)